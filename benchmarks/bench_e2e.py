@@ -0,0 +1,138 @@
+"""
+End to end benchmark against the local fixture site, no network needed.
+
+Runs `capture_news`, `fetch_data` and `store_data` as the robot does (one
+process per step, work items chained through files) and reports articles
+per second, WebDriver calls per article, peak RSS (robot + Chrome) and
+picture throughput.
+
+    python -m benchmarks.bench_e2e --results 300 --items 3 --latency 0.1
+"""
+from .fixture_site import FixtureSite, SiteConfig
+from time import perf_counter, sleep
+import argparse
+import json
+import os
+import pathlib
+import psutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).parent.parent
+PHRASES = ["covid", "trump", "economy", "election", "climate", "football"]
+
+
+def tree_rss(process: psutil.Process) -> int:
+    rss = 0
+    for p in [process, *process.children(recursive=True)]:
+        try:
+            rss += p.memory_info().rss
+        except psutil.Error:
+            continue
+    return rss
+
+
+def run_task(task: str, inputs: pathlib.Path, outputs: pathlib.Path,
+             artifacts: pathlib.Path, env: dict) -> dict:
+    """ Run one robot step, sampling the RSS of its whole process tree """
+    start = perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "robocorp.tasks", "run", "src/main.py",
+         "-t", task, "-o", str(artifacts / f"robot-{task}")],
+        cwd=ROOT,
+        env={**os.environ, **env,
+             "ROBOT_ARTIFACTS": str(artifacts),
+             "RC_WORKITEM_ADAPTER": "FileAdapter",
+             "RC_WORKITEM_INPUT_PATH": str(inputs),
+             "RC_WORKITEM_OUTPUT_PATH": str(outputs)},
+        stdout=subprocess.DEVNULL,
+    )
+    watched, peak = psutil.Process(process.pid), 0
+    while process.poll() is None:
+        peak = max(peak, tree_rss(watched))
+        sleep(0.1)
+    if process.returncode:
+        raise RuntimeError(f"{task} exited with {process.returncode}")
+    return {"seconds": perf_counter() - start, "peak_rss_mb": peak / 1024 / 1024}
+
+
+def latest(artifacts: pathlib.Path, pattern: str) -> dict:
+    paths = sorted(artifacts.glob(pattern))
+    return json.loads(paths[-1].read_text()) if paths else {}
+
+
+def run(config: SiteConfig, items: int, months: int, env: dict) -> dict:
+    with FixtureSite(config) as site, tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        artifacts = tmp / "output"
+        artifacts.mkdir()
+        work_items = tmp / "capture-in.json"
+        work_items.write_text(json.dumps([{
+            "payload": {
+                "search_phrase": PHRASES[i % len(PHRASES)],
+                "news_section": [],
+                "number_months": months,
+            },
+            "files": {},
+        } for i in range(items)]))
+
+        # nothing carried over from earlier runs or the real .cache:
+        # no picture cache, seen index, query cache or checkpoint
+        env = {"NEWS_BASE_URL": site.url, "PROFILE_WEBDRIVER": "1",
+               "CACHE_DIR": str(tmp / "cache"), "SEEN_INDEX": "0", "QUERY_CACHE": "0",
+               **env}
+        results = {}
+        for task, inputs, outputs in (
+            ("capture_news", work_items, tmp / "fetch-in.json"),
+            ("fetch_data", tmp / "fetch-in.json", tmp / "store-in.json"),
+            ("store_data", tmp / "store-in.json", tmp / "store-out.json"),
+        ):
+            results[task] = run_task(task, inputs, outputs, artifacts, env)
+
+        # inline, or the manifest of the result file (RESULT_FILE_FORMAT)
+        articles = sum(i["payload"]["search_result_file"]["articles"]
+                       if "search_result_file" in i["payload"]
+                       else len(i["payload"]["search_result"])
+                       for i in json.loads((tmp / "fetch-in.json").read_text()))
+        webdriver = latest(artifacts, "webdriver_capture_news_*.json")
+        trace = latest(artifacts, "trace_fetch_data_*.json")
+        downloads = [s for s in trace.get("spans", [])
+                     if s["name"] == "download_picture"]
+        download_time = trace.get("summary", {}).get(
+            "download_pictures", {}).get("total", 0)
+
+        results["capture_news"]["articles"] = articles
+        results["capture_news"]["articles_per_second"] = articles / \
+            results["capture_news"]["seconds"]
+        results["capture_news"]["webdriver_calls_per_article"] = \
+            webdriver.get("commands_per_article")
+        results["fetch_data"]["pictures"] = len(downloads)
+        results["fetch_data"]["pictures_per_second"] = \
+            len(downloads) / download_time if download_time else None
+        results["fetch_data"]["picture_mb_per_second"] = \
+            sum(s["attributes"].get("size", 0) for s in downloads) / 1024 / 1024 / download_time \
+            if download_time else None
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--results", type=int, default=SiteConfig.results)
+    parser.add_argument("--per-page", type=int, default=SiteConfig.per_page)
+    parser.add_argument("--days-between", type=float, default=SiteConfig.days_between)
+    parser.add_argument("--latency", type=float, default=SiteConfig.latency)
+    parser.add_argument("--image-latency", type=float, default=SiteConfig.image_latency)
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--json", type=pathlib.Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    results = run(SiteConfig(
+        results=args.results, per_page=args.per_page, days_between=args.days_between,
+        latency=args.latency, image_latency=args.image_latency),
+        items=args.items, months=args.months, env={"NEWS_ENGINE": args.engine})
+    print(json.dumps(results, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
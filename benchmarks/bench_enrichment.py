@@ -0,0 +1,56 @@
+"""
+Compare the per-article enrichment loop with the batch `enrich_articles`
+on synthetic articles.
+
+    python -m benchmarks.bench_enrichment --sizes 10000 100000 1000000
+"""
+from src.utils.enrichment import enrich_articles
+from time import perf_counter
+import argparse
+import random
+import re
+
+WORDS = ("covid", "market", "trump", "election", "economy", "health",
+         "$11.1", "$111,111.11", "11 dollars", "11 USD", "report", "world")
+
+
+def synthetic_articles(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{
+        "title": " ".join(rng.choices(WORDS, k=8)).capitalize(),
+        "description": " ".join(rng.choices(WORDS, k=30)),
+    } for _ in range(count)]
+
+
+def legacy_enrich(articles: list[dict], search_phrase: str) -> None:
+    # the loop fetch_data used to run
+    regex = r"\$\d+\.?\d*|\d+ dollars|\d+ USD"
+    for a in articles:
+        a["search_phrase_occurrences"] = ''.join(
+            (a["title"].lower(), a["description"].lower())).count(search_phrase)
+        a["has_amount"] = any(re.search(regex, text) for text in (
+            a["title"], a["description"]))
+
+
+def run(sizes: list[int], phrases: list[str]) -> None:
+    for size in sizes:
+        articles = synthetic_articles(size)
+        for name, func in (
+            ("loop", lambda: legacy_enrich(articles, phrases[0])),
+            ("batch", lambda: enrich_articles(articles, phrases[0])),
+            (f"batch x{len(phrases)}", lambda: enrich_articles(articles, phrases)),
+        ):
+            start = perf_counter()
+            func()
+            elapsed = perf_counter() - start
+            print(f"{size:>9} {name:<10} {elapsed:8.3f}s "
+                  f"{size / elapsed:>12.0f} articles/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--phrases", nargs="+", default=["covid", "trump", "market"])
+    args = parser.parse_args()
+    run(args.sizes, args.phrases)
@@ -0,0 +1,52 @@
+"""
+Compare batched (`execute_script`) and per-element article extraction.
+
+Opens a search, loads a few result pages (reporting the time spent waiting
+for each one) and then parses the same list with both strategies, counting
+the WebDriver commands and wall time each one takes.
+
+    python -m benchmarks.bench_extraction covid --pages 5
+"""
+from src.utils.news_browser import Aljazeera, profiler
+from time import perf_counter
+import argparse
+
+
+def run(search_phrase: str, pages: int, months: int) -> None:
+    with Aljazeera(headless=True, profile=True) as browser:
+        with browser.search(search_phrase) as result_page:
+            loaded = 0
+            for _ in range(pages - 1):
+                if not result_page.go_to_next_page():
+                    break
+                loaded += 1
+            print(f"{'paging':<12} pages={loaded:<5} "
+                  f"wait={result_page.wait_time:.3f}s "
+                  f"per_page={result_page.wait_time / max(loaded, 1):.3f}s")
+
+            for batch in (False, True):
+                # parse the whole list again on each run
+                result_page._cursor = 0
+                result_page.collected = 0
+                result_page.finished = False
+                profiler.reset()
+                start = perf_counter()
+                articles = result_page.get_articles(
+                    month_threshold=months, batch=batch)
+                elapsed = perf_counter() - start
+                calls = profiler.total
+                print(
+                    f"{'batch' if batch else 'per-element':<12} "
+                    f"articles={len(articles):<5} "
+                    f"commands={calls:<6} "
+                    f"per_article={calls / max(len(articles), 1):<6.2f} "
+                    f"time={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("search_phrase")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+    run(args.search_phrase, args.pages, args.months)
@@ -0,0 +1,166 @@
+"""
+Startup benchmark: import time of every robot task, with `python -X importtime`.
+
+Each task runs as the robot runs it (its own process, file work items)
+on a tiny input, `capture_news` with the HTTP engine against the local
+fixture site so no browser is started. Reports the import time per task
+and the slowest top level packages, and fails (exit 1) when:
+
+- a task imports a dependency it doesn't need (`FORBIDDEN`)
+- the import overhead of a task grows more than `--tolerance` over the baseline
+- a task has no baseline (record one with `--update`)
+
+The overhead is the import time of a task over the import time, measured
+on the same machine, of what it can't do without (`REQUIRED`), so the
+baseline holds on any machine, unlike milliseconds.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --update   # new baseline for the tasks run
+"""
+from .bench_e2e import ROOT
+from .fixture_site import FixtureSite, SiteConfig
+from time import perf_counter
+import argparse
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+
+BASELINE = pathlib.Path(__file__).parent / "baselines" / "startup.json"
+
+# Packages a task must never load. pandas loads pyarrow and openpyxl loads
+# lxml whenever they are installed, so they are allowed with them.
+FORBIDDEN = {
+    "capture_news": {"pandas", "openpyxl", "pyarrow"},
+    "fetch_data": {"RPA", "selenium", "openpyxl", "lxml"},
+    "store_data": {"RPA", "selenium", "pandas"},
+}
+# The runner, work items and logging, then the dependencies of each task
+FLOOR = ["robocorp.tasks", "robocorp.workitems", "loguru"]
+REQUIRED = {
+    "capture_news": ["RPA.Browser.Selenium", "lxml.html", "requests"],
+    "fetch_data": ["pandas", "requests"],
+    "store_data": ["openpyxl"],
+}
+ARTICLE = {"title": "Title", "date": 1700000000, "description": "Description",
+           "picture_url": None}
+PAYLOADS = {
+    "capture_news": {"search_phrase": "covid", "news_section": [], "number_months": 1},
+    "fetch_data": {"search_phrase": "covid", "search_result": [ARTICLE]},
+    "store_data": {"search_phrase": "covid", "search_result": [ARTICLE]},
+}
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """ Self import time in microseconds per module """
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = modules.get(match.group(4), 0) + int(match.group(1))
+    return modules
+
+
+def floor_ms(task: str) -> float:
+    """
+    Import time of the dependencies `task` can't do without, in milliseconds,
+    imported by a task of their own through the same runner (its import hooks
+    slow every import down).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        (tmp / "floor.py").write_text(
+            f"import {', '.join(FLOOR + REQUIRED[task])}\n"
+            "from robocorp.tasks import task\n\n\n"
+            "@task\ndef floor():\n    pass\n")
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "robocorp.tasks", "run",
+             str(tmp / "floor.py"), "-t", "floor", "-o", str(tmp / "robot")],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return sum(parse_importtime(process.stderr).values()) / 1000
+
+
+def run_task(task: str, env: dict) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        inputs = tmp / "in.json"
+        inputs.write_text(json.dumps([{"payload": PAYLOADS[task], "files": {}}]))
+        start = perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "robocorp.tasks", "run",
+             "src/main.py", "-t", task, "-o", str(tmp / "robot")],
+            cwd=ROOT,
+            env={**os.environ, **env,
+                 "ROBOT_ARTIFACTS": str(tmp),
+                 "CACHE_DIR": str(tmp / "cache"),
+                 "RC_WORKITEM_ADAPTER": "FileAdapter",
+                 "RC_WORKITEM_INPUT_PATH": str(inputs),
+                 "RC_WORKITEM_OUTPUT_PATH": str(tmp / "out.json")},
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        seconds = perf_counter() - start
+    if process.returncode:
+        raise RuntimeError(f"{task} exited with {process.returncode}")
+
+    modules = parse_importtime(process.stderr)
+    packages: dict[str, int] = {}
+    for name, micros in modules.items():
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + micros
+    return {
+        "seconds": round(seconds, 3),
+        "import_ms": round(sum(modules.values()) / 1000, 1),
+        "modules": len(modules),
+        "forbidden": sorted(FORBIDDEN[task] & packages.keys()),
+        "slowest": {name: round(micros / 1000, 1) for name, micros in
+                    sorted(packages.items(), key=lambda i: -i[1])[:10]},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", nargs="+", default=list(PAYLOADS))
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs of each task and of its floor, the fastest are kept")
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    with FixtureSite(SiteConfig(results=1)) as site:
+        env = {"NEWS_ENGINE": "http", "NEWS_BASE_URL": site.url}
+        results = {}
+        for task in args.tasks:
+            result = min((run_task(task, env) for _ in range(args.repeat)),
+                         key=lambda r: r["import_ms"])
+            floor = min(floor_ms(task) for _ in range(args.repeat))
+            result.update(floor_ms=round(floor, 1),
+                          overhead=round(result["import_ms"] / floor, 3))
+            results[task] = result
+    print(json.dumps(results, indent=2))
+
+    failures = [f"{task} imports {', '.join(r['forbidden'])}"
+                for task, r in results.items() if r["forbidden"]]
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update:
+        baseline.update({task: r["overhead"] for task, r in results.items()})
+        args.baseline.write_text(json.dumps(baseline, indent=2))
+        print(f"Baseline written to {args.baseline}")
+    else:
+        for task, r in results.items():
+            before = baseline.get(task)
+            if before is None:
+                failures.append(f"{task}: no baseline, record one with --update")
+            elif r["overhead"] > before * (1 + args.tolerance):
+                failures.append(f"{task}: overhead {r['overhead']} > {before}")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
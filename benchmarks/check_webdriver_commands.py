@@ -0,0 +1,78 @@
+"""
+Regression gate on a WebDriver profiler report (`output/webdriver_*.json`).
+
+Fails (exit 1) when commands per article, redundant commands or the
+commands of any type grow more than `--tolerance` over the baseline.
+Without a baseline the check is skipped (exit 0, with `--require-baseline`
+it fails): the baseline needs Chrome, record it with a Selenium run of
+`python -m benchmarks.bench_e2e` (fixture site, profiler on) and `--update`.
+
+    python -m benchmarks.check_webdriver_commands output/webdriver_capture_news_*.json
+    python -m benchmarks.check_webdriver_commands report.json --update   # new baseline
+"""
+import argparse
+import json
+import pathlib
+import sys
+
+BASELINE = pathlib.Path(__file__).parent / "baselines" / "webdriver_commands.json"
+
+
+def summarize(report: dict) -> dict:
+    return {
+        "commands_per_article": report["commands_per_article"],
+        "redundant_commands": report["redundant_commands"],
+        "commands": {name: c["count"] for name, c in report["commands"].items()},
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    def worse(now, before) -> bool:
+        return now is not None and before is not None and now > before * (1 + tolerance)
+
+    failures = []
+    for key in ("commands_per_article", "redundant_commands"):
+        if worse(current[key], baseline[key]):
+            failures.append(f"{key}: {current[key]} > {baseline[key]}")
+    for name, count in current["commands"].items():
+        if worse(count, baseline["commands"].get(name, 0)):
+            failures.append(
+                f"{name}: {count} > {baseline['commands'].get(name, 0)}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("report", type=pathlib.Path)
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Fail instead of skipping when there is no baseline")
+    args = parser.parse_args()
+
+    current = summarize(json.loads(args.report.read_text()))
+    if args.update:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        if args.require_baseline:
+            print(f"REGRESSION no baseline at {args.baseline}, record one with --update")
+            return 1
+        print(f"SKIPPED no baseline at {args.baseline}, record one from a Selenium "
+              f"run of benchmarks.bench_e2e with --update")
+        return 0
+
+    failures = compare(current, json.loads(
+        args.baseline.read_text()), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print(f"OK {current['commands_per_article']} commands per article, "
+              f"{current['redundant_commands']} redundant")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Local stand-in for the news site, to run and benchmark the robot offline.
+
+Serves search result pages with the same markup as the real site
+(`search-result__list`, `gc__title`, "show more" button and loading state),
+a working "show more" (JS fetch + append, or `?page=N` for the HTTP engine)
+and picture endpoints. Result count, date spread, page size and latency
+are configurable.
+
+    python -m benchmarks.fixture_site --port 8000 --results 500 --latency 0.2
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import hashlib
+import threading
+import time
+
+SHOW_MORE_JS = """
+document.addEventListener("click", async (event) => {
+    const button = event.target.closest(".show-more-button");
+    if (!button) return;
+    const list = document.querySelector(".search-result__list");
+    const loading = document.createElement("div");
+    loading.className = "show-more-button--loading";
+    button.after(loading);
+    const page = Number(button.dataset.page) + 1;
+    const response = await fetch(button.dataset.more + "?page=" + page);
+    list.insertAdjacentHTML("beforeend", await response.text());
+    button.dataset.page = page;
+    if (response.headers.get("X-Last-Page") === "1") button.remove();
+    loading.remove();
+});
+"""
+
+
+@dataclass
+class SiteConfig:
+    results: int = 200          # results per search
+    per_page: int = 10          # results per "show more"
+    days_between: float = 1.0   # date spread between consecutive results
+    latency: float = 0.0        # seconds added to every page / fragment
+    image_latency: float = 0.0  # seconds added to every picture
+    image_size: int = 20_000    # bytes per picture
+
+
+# First url path segment of the articles, in turns
+SECTIONS = ["news", "economy", "features", "sports", "opinions"]
+
+
+def article_html(base_url: str, phrase: str, index: int, config: SiteConfig) -> str:
+    date = datetime.now() - timedelta(days=index * config.days_between)
+    section = SECTIONS[index % len(SECTIONS)]
+    phrase = escape(phrase)
+    money = "$111,111.11" if index % 4 == 0 else "11 USD" if index % 4 == 1 else "no amount"
+    return f"""
+<article class="gc u-clickable-card gc--type-post gc--list gc--with-image">
+  <div class="gc__content">
+    <div class="gc__header-wrap">
+      <h3 class="gc__title"><a class="u-clickable-card__link" href="{base_url}/{section}/{index}/{phrase}-story-{index}">
+        <span>{phrase.title()} story number {index}</span></a></h3>
+    </div>
+    <div class="gc__excerpt"><div class="gc__body-wrap">
+      <p>{index % 23 + 1} hours ago ... ... A story about {phrase} mentioning {money} ...</p>
+    </div></div>
+    <footer class="gc__footer"><div class="gc__date">
+      <span class="screen-reader-text">Published On</span>
+      <span aria-hidden="true">{date.day} {date:%b %Y}</span>
+    </div></footer>
+  </div>
+  <div class="gc__image-wrap"><div class="responsive-image">
+    <img class="article-card__image gc__image" src="{base_url}/images/{index % 50}.jpg" alt="">
+  </div></div>
+</article>"""
+
+
+def make_handler(config: SiteConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        @property
+        def base_url(self) -> str:
+            return f"http://{self.headers.get('Host')}"
+
+        def send(self, body: bytes, content_type: str = "text/html; charset=utf-8",
+                 headers: dict = None) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def articles(self, phrase: str, page: int) -> tuple[str, bool]:
+            first = (page - 1) * config.per_page
+            last = min(first + config.per_page, config.results)
+            html = "".join(article_html(self.base_url, phrase, i, config)
+                           for i in range(first, last))
+            return html, last >= config.results
+
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            parts = [unquote(p) for p in url.path.strip("/").split("/")]
+
+            if parts[0] == "images" and len(parts) == 2:
+                time.sleep(config.image_latency)
+                seed = hashlib.sha256(parts[1].encode()).digest()
+                body = (seed * (config.image_size // len(seed) + 1))[:config.image_size]
+                return self.send(body, "image/jpeg", {
+                    "ETag": f'"{seed.hex()[:16]}"', "Cache-Control": "max-age=3600"})
+
+            time.sleep(config.latency)
+            if parts[0] == "search" and len(parts) == 3 and parts[2] == "more":
+                html, last = self.articles(parts[1], page)
+                return self.send(html.encode(), headers={"X-Last-Page": str(int(last))})
+
+            if parts[0] == "search" and len(parts) == 2:
+                html, last = self.articles(parts[1], page)
+                button = "" if last else (
+                    f'<button class="show-more-button grid-full-width" data-page="{page}" '
+                    f'data-more="/search/{escape(parts[1])}/more">Show more</button>')
+                body = f"""<!DOCTYPE html><html><head><title>Search - {escape(parts[1])}</title></head>
+<body><main><div class="search-result__list">{html}</div>{button}</main>
+<script>{SHOW_MORE_JS}</script></body></html>"""
+                return self.send(body.encode())
+
+            if not parts[0]:
+                return self.send(b"<!DOCTYPE html><html><head><title>Home</title></head>"
+                                 b"<body><main>Fixture news site</main></body></html>")
+
+            self.send_error(404)
+
+    return Handler
+
+
+class FixtureSite:
+    """
+    Runs the fixture site in a background thread.
+
+    Usage:
+        with FixtureSite(SiteConfig(results=100)) as site:
+            print(site.url)
+    """
+
+    def __init__(self, config: SiteConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or SiteConfig()
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.config))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> 'FixtureSite':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--results", type=int, default=SiteConfig.results)
+    parser.add_argument("--per-page", type=int, default=SiteConfig.per_page)
+    parser.add_argument("--days-between", type=float, default=SiteConfig.days_between)
+    parser.add_argument("--latency", type=float, default=SiteConfig.latency)
+    parser.add_argument("--image-latency", type=float, default=SiteConfig.image_latency)
+    args = parser.parse_args()
+
+    site = FixtureSite(SiteConfig(
+        results=args.results, per_page=args.per_page, days_between=args.days_between,
+        latency=args.latency, image_latency=args.image_latency), port=args.port)
+    with site:
+        print(f"Serving on {site.url}")
+        site.thread.join()
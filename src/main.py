@@ -1,43 +1,128 @@
-from functools import wraps
-from src.utils import news_browser
-from src.utils.news_browser import (
-    NewsBrowser,
-    Article,
-    Aljazeera
-)
-from src.utils.default import retry_on_error
-import multiprocessing.pool
+# Each task runs in its own process (see robot.yaml), so the heavy
+# dependencies (Selenium, pandas, requests, openpyxl) are imported
+# by the tasks that need them, not here.
+# `python -m benchmarks.bench_startup` guards the import time of every task.
+from src.utils.default import retry_on_error, default_worker_count, QUERY_KEYS
+from src.utils.metrics import HostSampler
+from src.utils.tracing import tracer
 from robocorp.tasks import task, ITask, setup
 from robocorp import workitems
 from loguru import logger
-import psutil
+from datetime import datetime
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, Optional
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import pathlib
-import requests
 import sys
-import random
-import multiprocessing
-import re
+import tempfile
+import threading
+import os
 from src.utils import exceptions
-import string
-import pandas as pd
-
-# get above /output
-OUTPUT_DIR = pathlib.Path(__file__).parent.parent / "output"
+from src.utils.checkpoint import CrawlCheckpoint
+from src.utils.result_files import RESULT_FILE_KEY, ResultFileWriter, read_result_file
+
+if TYPE_CHECKING:
+    from src.utils.news_browser import NewsBrowser, ArticleRecord, BrowserPool
+    from src.utils.seen_index import SeenIndex
+    from src.utils.query_cache import QueryCache
+    from src.utils.downloader import DownloadResult, ImageDownloader
+    from src.utils.writers import ArticleWriter
+
+# get above /output, unless the run has its own artifacts directory
+OUTPUT_DIR = pathlib.Path(
+    os.environ.get("ROBOT_ARTIFACTS") or pathlib.Path(__file__).parent.parent / "output")
 # IMAGE_DIR = OUTPUT_DIR / "images"
 IMAGE_DIR = OUTPUT_DIR
+# Persistent between runs, not an artifact (CACHE_DIR moves it, e.g. for benchmarks)
+CACHE_DIR = pathlib.Path(
+    os.environ.get("CACHE_DIR") or pathlib.Path(__file__).parent.parent / ".cache")
+IMAGE_CACHE_DIR = CACHE_DIR / "images"
+# Articles captured per query (SEEN_INDEX=1 to enable), recurring searches
+# stop at the known ones, so they only bring what is new since the last run
+SEEN_INDEX_PATH = CACHE_DIR / "seen.sqlite3"
+SEEN_INDEX = os.environ.get("SEEN_INDEX", "").lower() in ("1", "true")
+SEEN_STOP_AFTER = 3  # consecutive known articles ending a search
+# Crawl progress per work item, retries and items queued again resume from it
+CHECKPOINT_DIR = CACHE_DIR / "checkpoints"
+# Articles of a search kept in memory, past it they are spilled to disk
+SPOOL_MAX_IN_MEMORY = 1000
+SPOOL_DIR = CACHE_DIR / "spool"
+# Search results shared by work items with the same query (QUERY_CACHE=0 to disable),
+# fresh for QUERY_CACHE_TTL seconds, then served while refreshed in the
+# background for QUERY_CACHE_STALE_TTL more seconds
+QUERY_CACHE_DIR = CACHE_DIR / "queries"
+QUERY_CACHE = os.environ.get("QUERY_CACHE", "true").lower() in ("1", "true")
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 3600))
+QUERY_CACHE_STALE_TTL = float(os.environ.get("QUERY_CACHE_STALE_TTL", 6 * 3600))
+
+# Articles passed to the next step as a work item file ("jsonl" gzipped or
+# "parquet"), with only a manifest in the payload, instead of inline
+# `search_result` (empty). Steps read it, and enrich, a batch at a time.
+RESULT_FILE_FORMAT = os.environ.get("RESULT_FILE_FORMAT", "")
+RESULT_FILE_BATCH_SIZE = 1000
 
 MAX_TASK_RETRIES = 3
 
+# Seconds between host metrics samples (log fields and metrics_*.csv)
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", 5))
+
+# Browser reuse across work items
+BROWSER_MAX_USES = 20
+
+# Output, OUTPUT_WORKBOOK puts every query in one workbook (a sheet per query)
+# instead of a file per query, OUTPUT_FORMATS adds csv/parquet files
+OUTPUT_WORKBOOK = os.environ.get("OUTPUT_WORKBOOK")
+OUTPUT_FORMATS = os.environ.get("OUTPUT_FORMATS", "xlsx").split(",")
+
+# Count and time every WebDriver command, report in output/webdriver_*.json
+PROFILE_WEBDRIVER = os.environ.get("PROFILE_WEBDRIVER", "").lower() in ("1", "true")
+
+# Lean Chrome profile: no images/fonts/media/ads/trackers (network usage in the trace with PROFILE_WEBDRIVER)
+LEAN_BROWSER = os.environ.get("LEAN_BROWSER", "true").lower() in ("1", "true")
+
+# Persistent Chrome profile (cookies, cache) reused across browsers,
+# one directory per capture worker
+BROWSER_PROFILE_DIR = os.environ.get("BROWSER_PROFILE_DIR") or None
+
+# "selenium" or "http" (browserless, falls back to selenium when needed)
+NEWS_ENGINE = os.environ.get("NEWS_ENGINE", "selenium")
+# Site root, overridden to run against a local fixture site
+NEWS_BASE_URL = os.environ.get("NEWS_BASE_URL") or None
+
+# Fused mode (run_pipeline), articles waiting between two stages
+# and articles enriched at once
+PIPELINE_QUEUE_SIZE = 100
+PIPELINE_BATCH_SIZE = 20
+
+# Parallel capture, one browser per worker thread
+# CAPTURE_WORKERS env var overrides the default (CPUs / available memory)
+CAPTURE_WORKERS_ENV = "CAPTURE_WORKERS"
+BROWSER_MEMORY = 512 * 1024 * 1024  # expected peak per Chrome worker
+# Work item API calls (reserve, release, outputs) of the capture threads
+WORKITEMS_LOCK = threading.Lock()
+
+# Picture downloads
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_PER_HOST = 4
+DOWNLOAD_TIMEOUT = (5, 30)  # connect, read (seconds)
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
 
-def setup_logger():
+def setup_logger(task_name: str = "run") -> HostSampler:
     # Setting up loguru
 
     global logger
-    logger = logger.patch(lambda record: record["extra"].update(
-        cpu=f"{psutil.cpu_percent()}%",
-        mem=f"{psutil.virtual_memory().percent}%",
-        disk=f"{psutil.disk_usage('/').percent}%",
-    ))
+    # Host metrics are sampled in the background,
+    # the patcher only reads the last sample
+    sampler = HostSampler(
+        interval=METRICS_INTERVAL,
+        path=OUTPUT_DIR / f"metrics_{task_name}_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    )
+    sampler.start()
+    logger = logger.patch(
+        lambda record: record["extra"].update(sampler.values))
 
     logger_format = (
         "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
@@ -45,6 +130,7 @@ def setup_logger():
         "<fg #ff00ff>CPU {extra[cpu]: <5}</fg #ff00ff> | "
         "<fg #ff00ff>MEM {extra[mem]: <5}</fg #ff00ff> | "
         "<fg #ff00ff>DISK {extra[disk]: <5}</fg #ff00ff> | "
+        "<fg #ff00ff>RSS {extra[rss]: <8}</fg #ff00ff> | "
         # log level in brackets
 
         "<level>{level: <8}</level> | "
@@ -53,7 +139,8 @@ def setup_logger():
     )
 
     # Default values
-    logger.configure(extra={"cpu": "", "mem": "", "disk": ""})
+    logger.configure(
+        extra={"cpu": "", "mem": "", "disk": "", "rss": "", "chrome": ""})
     logger.remove()
     logger.add(
         str(OUTPUT_DIR / "{time:YYYY-MM-DD}.log"),  # or sys.stdout
@@ -64,6 +151,7 @@ def setup_logger():
         enqueue=True
     )
     logger.add(sys.stdout, colorize=True, format=logger_format, level="DEBUG")
+    return sampler
 
 
 def setup_directories():
@@ -77,55 +165,163 @@ def setup(task: ITask):
     assert workitems.inputs.current.payload, "No input data was provided"
     logger.debug(f"Workitem: {workitems.inputs.current.payload}")
 
-    logger.debug("Setting up logger...")
-    setup_logger()
-    logger.debug("Logger setup complete")
-
     logger.debug("Setting up directories...")
     setup_directories()
     logger.debug("Directories setup complete")
 
+    logger.debug("Setting up logger...")
+    sampler = setup_logger(task.name)
+    logger.debug("Logger setup complete")
+
+    tracer.reset()
+    yield
+
+    path = tracer.export(OUTPUT_DIR, task.name)
+    for name, stats in tracer.summary().items():
+        logger.info(
+            f"Span {name}: n={stats['count']} total={stats['total']:.3f}s "
+            f"p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s")
+    logger.info(f"Trace exported to {path}")
+    sampler.stop()
+
+
+def open_seen_index() -> 'SeenIndex | nullcontext':
+    if not SEEN_INDEX:
+        return nullcontext()
+    from src.utils.seen_index import SeenIndex
+    return SeenIndex(SEEN_INDEX_PATH, stop_after=SEEN_STOP_AFTER, logger=logger)
+
+
+def open_query_cache() -> 'QueryCache | nullcontext':
+    if not QUERY_CACHE:
+        return nullcontext()
+    from src.utils.query_cache import QueryCache
+    return QueryCache(QUERY_CACHE_DIR, ttl=QUERY_CACHE_TTL, stale_ttl=QUERY_CACHE_STALE_TTL,
+                      site=NEWS_BASE_URL, logger=logger)
+
+
+def open_browser_pool(size: int = 1) -> 'BrowserPool':
+    """ Pool of up to `size` warm browsers, each with its own profile directory """
+    from src.utils.news_browser import Aljazeera, BrowserPool
+
+    return BrowserPool(
+        lambda slot: Aljazeera(logger=logger, headless=True, url=NEWS_BASE_URL,
+                               profile=PROFILE_WEBDRIVER, lean=LEAN_BROWSER,
+                               user_data_dir=browser_profile_dir(slot)),
+        size=size,
+        max_uses=BROWSER_MAX_USES,
+        logger=logger
+    )
+
+
+def open_downloader() -> 'ImageDownloader':
+    from src.utils.downloader import ImageDownloader
+    from src.utils.image_cache import ImageCache
+
+    return ImageDownloader(
+        IMAGE_DIR,
+        max_workers=DOWNLOAD_WORKERS,
+        per_host=DOWNLOAD_PER_HOST,
+        timeout=DOWNLOAD_TIMEOUT,
+        cache=ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, logger=logger),
+        logger=logger
+    )
+
+
+def open_writer() -> 'ArticleWriter':
+    from src.utils.writers import ArticleWriter
+
+    return ArticleWriter(
+        OUTPUT_DIR,
+        single_workbook=OUTPUT_WORKBOOK,
+        formats=OUTPUT_FORMATS,
+        logger=logger
+    )
+
+
+def open_checkpoint(item: workitems.Input) -> CrawlCheckpoint:
+    """ Crawl checkpoint of `item`, resumed only by the same query on the same site """
+    query = {key: item.payload.get(key) for key in QUERY_KEYS}
+    return CrawlCheckpoint(CHECKPOINT_DIR, item.id, query={**query, "site": NEWS_BASE_URL})
+
+
+def iter_search(browser: 'NewsBrowser', search_phrase: str, news_section: str,
+                number_months: str, max_articles: int = None, started: float = None,
+                index: 'SeenIndex' = None,
+                checkpoint: 'CrawlCheckpoint' = None) -> Generator['ArticleRecord', None, None]:
+    """
+    Yield the unique articles of a search as the pages load.
+    Past `SPOOL_MAX_IN_MEMORY`, the articles kept to drop duplicates
+    and fill the index are spilled to disk.
+    `started`: `perf_counter` time the item started at, for the time to first article
+    `index`: articles of previous runs, the search stops when it reaches them,
+        the articles found are added to it once the search is complete
+    `checkpoint`: progress of a previous attempt to resume from, updated
+        page by page and cleared once the search is complete
+    """
+    from src.utils.news_browser import ArticleRecord, ArticleSpool
 
-@logger.catch
-def search(browser: NewsBrowser, search_phrase: str, news_section: str, number_months: str) -> set[Article]:
     logger.info("Searching for news...")
     # search_phrase = "silvio santos"
-    with browser.search(search_phrase) as result_page:
+    with tracer.span("search", search_phrase=search_phrase) as span, \
+            browser.search(search_phrase) as result_page:
         if news_section and result_page.has_news_section:
-            result_page.select_section(news_section)
-            logger.info(f"Selected section: {news_section}")
+            ignored = result_page.select_section(news_section)
+            if ignored:
+                logger.warning(f"Sections not available, ignored: {ignored}")
+            logger.info(f"Selected sections: {sorted(result_page.sections or ['all'])}")
+        if index is not None:
+            result_page.known = index.query(search_phrase, news_section)
 
         logger.info("Collecting articles...")
-        articles = set(result_page.get_articles(month_threshold=number_months))
-        while result_page.go_to_next_page():
-            logger.info("Navigating to next page...")
-            articles.update(result_page.get_articles())
-        logger.info(f"Found {len(articles)} articles")
+        with ArticleSpool(SPOOL_MAX_IN_MEMORY, SPOOL_DIR) as articles:
+            new = 0
+            if checkpoint is not None:
+                state, collected = checkpoint.load()
+                if state:
+                    with tracer.span("resume", page=state["page"]) as resume:
+                        result_page.restore(state)
+                        resume.set(articles=len(collected), reached=result_page.page)
+                    logger.info(f"Resuming from page {result_page.page} "
+                                f"with {len(collected)} articles")
+                    for data in collected:
+                        article = ArticleRecord.from_dict(data)
+                        if articles.add(article):
+                            new += bool(article.is_new)
+                            yield article
+                result_page.checkpoint = checkpoint
+            for article in result_page.iter_articles(
+                    month_threshold=number_months, max_articles=max_articles):
+                if not articles.add(article):
+                    continue
+                if len(articles) == 1:
+                    first = perf_counter() - (started or span.start)
+                    span.set(time_to_first_article=round(first, 3))
+                    logger.info(f"First article in {first:.2f}s")
+                new += bool(article.is_new)
+                yield article
+            span.set(articles=len(articles), spilled=articles.spilled)
+            if result_page.known is not None:
+                span.set(new_articles=new)
+                logger.info(f"Found {len(articles)} articles ({new} new)")
+                result_page.known.add(articles)
+            else:
+                logger.info(f"Found {len(articles)} articles")
+    if checkpoint is not None:
+        checkpoint.clear()
     logger.info("News search complete")
-    return articles
-
-
-@logger.catch
-def download_picture(article: dict):
-    file_name = ''.join(random.choices(string.ascii_lowercase, k=10)) + ".png"
-    response = requests.get(article['picture_url'])
-    if response.status_code == 200:
-        with open(IMAGE_DIR / file_name, "wb") as file:
-            file.write(response.content)
-        article['image_path'] = str((IMAGE_DIR / file_name).absolute())
-    else:
-        logger.error(f"Failed to download image: {article['image_url']}")
 
 
 @logger.catch
-def download_pictures(articles: list[dict]):
-    # If we want to download the pictures in parallel
-    # pool = multiprocessing.pool.ThreadPool(5)
-    # result = pool.map_async(download_picture, articles)
-    # result.wait()  # Wait for the download to finish
+@tracer.traced()
+def download_pictures(articles: list[dict], downloader: 'ImageDownloader') -> list['DownloadResult']:
+    results = downloader.download_all(
+        article.get('picture_url') for article in articles)
 
-    for article in articles:
-        download_picture(article)
+    for article, result in zip(articles, results):
+        if result.ok:
+            article['image_path'] = str(result.path)
+    return results
 
 
 def validate_payload(payload: dict, expected_keys: list[str]) -> None:
@@ -135,25 +331,141 @@ def validate_payload(payload: dict, expected_keys: list[str]) -> None:
             f"Missing keys in payload: {missing_keys}")
 
 
+def load_results(item: workitems.Input, directory: pathlib.Path) -> Iterable[dict]:
+    """
+    Articles of a work item, inline in the payload or read lazily
+    from its result file (downloaded to `directory`).
+    """
+    payload = item.payload
+    if RESULT_FILE_KEY in payload:
+        manifest = payload[RESULT_FILE_KEY]
+        path = item.get_file(manifest["name"], directory / manifest["name"])
+        return read_result_file(path, manifest["format"], RESULT_FILE_BATCH_SIZE)
+    validate_payload(payload, ["search_result"])
+    return payload["search_result"]
+
+
+def create_output(item: workitems.Input, articles: Iterable[dict]) -> int:
+    """
+    Next work item with the payload of `item` and the articles, see `RESULT_FILE_FORMAT`.
+    A result file is written as the articles come, inline they are all
+    gathered in the payload. Returns the number of articles.
+    """
+    payload = item.payload
+    payload.pop(RESULT_FILE_KEY, None)
+    if not RESULT_FILE_FORMAT:
+        payload["search_result"] = list(articles)
+        with WORKITEMS_LOCK:
+            output = item.create_output()
+            output.payload = payload
+            output.save()
+        return len(payload["search_result"])
+
+    payload.pop("search_result", None)
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultFileWriter(tmp, RESULT_FILE_FORMAT, RESULT_FILE_BATCH_SIZE) as file:
+            file.extend(articles)
+        payload[RESULT_FILE_KEY] = file.manifest
+        # the file is copied or uploaded when the item is saved
+        with WORKITEMS_LOCK:
+            output = item.create_output()
+            output.payload = payload
+            output.add_file(file.path)
+            output.save()
+    return file.count
+
+
+def iter_capture(query: dict, pool: 'BrowserPool', index: 'SeenIndex' = None,
+                 checkpoint: 'CrawlCheckpoint' = None) -> Generator['ArticleRecord', None, None]:
+    """
+    Yield the articles of `query` (`QUERY_KEYS` of a payload) as the pages load,
+    with the HTTP engine when enabled, falling back to a browser of `pool`
+    when it can't read the result page.
+    """
+    query = {key: query[key] for key in QUERY_KEYS if key in query}
+    started = perf_counter()
+    if NEWS_ENGINE == "http":
+        from src.utils.news_browser import AljazeeraHttp
+        found = 0
+        try:
+            with AljazeeraHttp(logger=logger, url=NEWS_BASE_URL) as news_browser:
+                for article in iter_search(news_browser, **query, started=started,
+                                           index=index, checkpoint=checkpoint):
+                    found += 1
+                    yield article
+            return
+        except exceptions.UnsupportedPage as e:
+            # articles already went out, starting over would repeat them
+            if found:
+                raise
+            logger.warning(f"Falling back to the browser: {e}")
+
+    with pool.lease() as news_browser:
+        yield from iter_search(news_browser, **query, started=started,
+                               index=index, checkpoint=checkpoint)
+
+
+def revalidate(cache: 'QueryCache', payload: dict, pool: 'BrowserPool') -> None:
+    """
+    Refresh the stale cached result of `payload` in the background. The search
+    runs without the seen index: it would stop at the articles of the previous
+    run and mark the ones found as captured though no work item delivers them.
+    """
+    query = {key: payload[key] for key in QUERY_KEYS if key in payload}
+    cache.revalidate(query, lambda: (
+        article.to_dict() for article in iter_capture(query, pool)))
+
+
+def find_articles(payload: dict, pool: 'BrowserPool', index: 'SeenIndex' = None,
+                  cache: 'QueryCache' = None,
+                  checkpoint: 'CrawlCheckpoint' = None) -> Iterable[dict]:
+    """
+    Articles of the query of `payload`, from the query cache or a search.
+    The cache holds whole searches, shared by every run: with it, the search
+    doesn't stop at the articles of the seen index, the index is applied
+    afterwards to the cached or found articles (`KnownArticles.filter`).
+    """
+    if cache is None:
+        return (article.to_dict() for article in iter_capture(payload, pool, index, checkpoint))
+
+    cached = cache.get(payload)
+    if cached is not None:
+        # no search, no browser
+        logger.info(f"Query cache hit ({'fresh' if cached.fresh else 'stale'}): "
+                    f"{len(cached.articles)} articles")
+        if not cached.fresh:
+            revalidate(cache, payload, pool)
+        articles = cached.articles
+    else:
+        articles = cache.recording(payload, (
+            article.to_dict() for article in iter_capture(payload, pool, checkpoint=checkpoint)))
+    if index is None:
+        return articles
+    return index.query(payload["search_phrase"], payload["news_section"]).filter(articles)
+
+
 @logger.catch(reraise=True)
 @retry_on_error(
     max_retries=MAX_TASK_RETRIES,
     execept=(exceptions.InvalidWorkItem, exceptions.BusinessException),
     logger=logger
 )
-def fetch_news(item: dict) -> None:
+@tracer.traced()
+def fetch_news(item: workitems.Input, pool: 'BrowserPool', index: 'SeenIndex' = None,
+               cache: 'QueryCache' = None, checkpoint: 'CrawlCheckpoint' = None) -> int:
+    """ Search the query of `item` into its output, returns the number of articles """
+    payload = item.payload
     logger.info("Validating workitem parameters...")
     # First lets validate the workitem
     # We need to make sure that the workitem has the required parameters
     expected_params = (
         "search_phrase", "news_section", "number_months")
-    validate_payload(item, expected_params)
+    validate_payload(payload, expected_params)
     logger.info("Workitem parameters validated")
 
-    with Aljazeera(logger=logger, headless=True) as news_browser:
-        articles: set[Article] = search(news_browser, **item)
-        item["search_result"] = [article.to_dict()
-                                 for article in articles]
+    # a retry continues from the checkpoint of the failed attempt,
+    # the articles go from the spool to the output as they are found
+    return create_output(item, find_articles(payload, pool, index, cache, checkpoint))
 
 
 @task()
@@ -168,81 +480,223 @@ def store_data():
     - True or False, depending on whether the title or description contains any amount of money
         > Possible formats: $11.1 | $111,111.11 | 11 dollars | 11 USD
     """
-    for item in workitems.inputs:
-        # item is expected to be a dictionary
-        # and already have the search result
-        # with the articles and their information
-        try:
-            payload = item.payload
-            logger.info("Validating payload...")
-            validate_payload(payload, ["search_result"])
-            logger.info("Payload validated")
-
-            # Save articles
-            logger.info("Saving articles to Excel...")
-            articles = payload["search_result"]
+    from src.utils.writers import query_name
+
+    with open_writer() as writer:
+        for item in workitems.inputs:
+            # item is expected to be a dictionary
+            # and already have the search result
+            # with the articles and their information
+            try:
+                payload = item.payload
+                with tempfile.TemporaryDirectory() as tmp:
+                    logger.info("Validating payload...")
+                    articles = load_results(item, pathlib.Path(tmp))
+                    logger.info("Payload validated")
+
+                    # Save articles
+                    # rows are streamed, the date is formatted
+                    # from unix timestamp to datetime on the way
+                    logger.info("Saving articles to Excel...")
+                    writer.write(query_name(payload), articles, item_id=item.id)
+                    logger.info("Articles saved to Excel")
+                item.done()
+
+            except Exception as e:
+                logger.error(f"Failed to process workitem: {e}")
+                item.fail(**exceptions.UnexpectedError(str(e)))
+
+
+def process_articles(articles: Iterable[dict], payload: dict,
+                     downloader: 'ImageDownloader') -> Generator[dict, None, None]:
+    """ Enrich the articles and download their pictures with `downloader`, a batch at a time """
+    from src.utils.enrichment import enrich_articles
+
+    articles = iter(articles)
+    while batch := list(islice(articles, RESULT_FILE_BATCH_SIZE)):
+        # Search Phrase Ocurrences count in title and description
+        # Money in title or description
+        # - True or False, depending on whether the title or description contains any amount of money
+        # Possible formats: $11.1 | $111,111.11 | 11 dollars | 11 USD
+        with tracer.span("enrich_articles", articles=len(batch)):
+            enrich_articles(batch, payload["search_phrase"],
+                            money_formats=payload.get("money_formats"))
+        logger.info("Downloading pictures...")
+        download_pictures(batch, downloader)
+        logger.info("Pictures downloaded")
+        yield from batch
 
-            df = pd.DataFrame(articles)
 
-            # Keep only the columns we need
-            df = df[["title", "date", "description", "image_path",
-                     "search_phrase_occurrences", "has_amount"]]
+@task()
+def fetch_data():
+    # one download session and picture cache for every item
+    with open_downloader() as downloader:
+        for item in workitems.inputs:
+            try:
+                # Search Phase Ocurrences count in title and description
+                payload = item.payload
+                with tempfile.TemporaryDirectory() as tmp:
+                    logger.info("Validating payload...")
+                    validate_payload(payload, ["search_phrase"])
+                    articles = load_results(item, pathlib.Path(tmp))
+                    logger.info("Payload validated")
+
+                    logger.info("Processing articles...")
+                    # read, processed and written to the next item as they go
+                    create_output(item, process_articles(articles, payload, downloader))
+                    logger.info("Articles processed")
+                item.done()
+            except Exception as e:
+                logger.error(f"Failed to process workitem: {e}")
+                item.fail(**exceptions.UnexpectedError(str(e)))
+            # every batch of the item in one line
+            downloader.log_summary()
+
+
+def capture_worker_count() -> int:
+    if os.environ.get(CAPTURE_WORKERS_ENV):
+        return max(1, int(os.environ[CAPTURE_WORKERS_ENV]))
+    return default_worker_count(BROWSER_MEMORY)
+
+
+def _private_input_reserver() -> Optional[Callable[[], workitems.Input]]:
+    """
+    PRIVATE robocorp-workitems API, the only place using it.
+    `workitems.inputs` holds a single reserved input at a time, parallel capture
+    reserves the other ones through the adapter of the current input
+    (`Input._adapter`, `adapter.reserve_input`), without the library's
+    bookkeeping of the current input. Returns None when those internals are
+    missing (another robocorp version), the capture then runs one item at a time.
+    """
+    adapter = getattr(workitems.inputs.current, "_adapter", None)
+    if not callable(getattr(adapter, "reserve_input", None)):
+        return None
 
-            # Format date
-            # from unix timestamp to datetime
-            df["date"] = pd.to_datetime(df["date"], unit="s")
+    def reserve() -> workitems.Input:
+        item = workitems.Input(adapter=adapter, item_id=adapter.reserve_input())
+        item.load()
+        return item
+    return reserve
 
-            df.to_excel(
-                OUTPUT_DIR / f"articles_{hash(item)}.xlsx", index=False)
-            logger.info("Articles saved to Excel")
-            item.done()
 
-        except Exception as e:
-            logger.error(f"Failed to process workitem: {e}")
-            item.fail(**exceptions.UnexpectedError(str(e)))
+def reserve_inputs(reserve: Callable[[], workitems.Input]) -> Generator[workitems.Input, None, None]:
+    """
+    Input items of the queue, the next one is reserved with `reserve` without
+    waiting for the previous ones to be released, so several capture threads
+    each hold one. The first one is the current input of `workitems.inputs`.
+    """
+    first = workitems.inputs.current
+    if not first.released:
+        yield first
+    while True:
+        with WORKITEMS_LOCK:
+            try:
+                item = reserve()
+            except workitems.EmptyQueue:
+                return
+        yield item
 
 
 @task()
-def fetch_data():
-    for item in workitems.inputs:
-        try:
-            # Search Phase Ocurrences count in title and description
-            payload = item.payload
-            logger.info("Validating payload...")
-            validate_payload(payload, ["search_phrase", "search_result"])
-            logger.info("Payload validated")
-
-            search_phrase = payload["search_phrase"]
-            regex = r"\$\d+\.?\d*|\d+ dollars|\d+ USD"
-            logger.info("Processing articles...")
-            for a in payload["search_result"]:
-                # Search Phrase Ocurrences count in title and description
-                a["search_phrase_occurrences"] = ''.join(
-                    (a["title"].lower(), a["description"].lower())).count(search_phrase)
-                # Money in title or description
-                # - True or False, depending on whether the title or description contains any amount of money
-                # Possible formats: $11.1 | $111,111.11 | 11 dollars | 11 USD
-                a["has_amount"] = any(re.search(regex, text) for text in (
-                    a["title"], a["description"]))
-            # Save articles
-            logger.info("Downloading pictures...")
-            download_pictures(payload["search_result"])
-            logger.info("Pictures downloaded")
-            logger.info("Articles processed")
-            workitems.outputs.create(payload)
+def capture_news():
+    capture_items(capture_worker_count())
+
+
+def browser_profile_dir(slot: int) -> str:
+    if not BROWSER_PROFILE_DIR:
+        return None
+    # Chrome locks a profile, every live browser gets its own
+    path = pathlib.Path(BROWSER_PROFILE_DIR) / f"browser-{slot}"
+    path.mkdir(parents=True, exist_ok=True)
+    return str(path)
+
+
+def capture_item(item: workitems.Input, pool: 'BrowserPool', index: 'SeenIndex' = None,
+                 cache: 'QueryCache' = None) -> int:
+    """ Capture one input item into its output, returns the number of articles """
+    try:
+        articles = fetch_news(item, pool, index, cache, open_checkpoint(item))
+        with WORKITEMS_LOCK:
             item.done()
-        except Exception as e:
-            logger.error(f"Failed to process workitem: {e}")
+        return articles
+    except Exception as e:
+        logger.error(f"Failed to process workitem: {e}")
+        with WORKITEMS_LOCK:
             item.fail(**exceptions.UnexpectedError(str(e)))
+        return 0
+
+
+def capture_items(workers: int = 1):
+    """
+    Capture every input item, `workers` at a time, each thread
+    with its own browser from the pool.
+    """
+    from src.utils.news_browser import profiler
+
+    reserve = _private_input_reserver() if workers > 1 else None
+    if workers > 1 and reserve is None:
+        logger.warning("Work items can't be reserved in parallel, capturing one at a time")
+        workers = 1
+    start, processed, articles = perf_counter(), 0, 0
+    profiler.reset()
+    with open_browser_pool(workers) as pool, open_seen_index() as index, open_query_cache() as cache, ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="capture"
+    ) as executor:
+        logger.info(f"Capturing with {workers} browsers")
+        # an item is reserved when a thread is free to take it
+        free = threading.Semaphore(workers)
+        items = iter(workitems.inputs) if reserve is None else reserve_inputs(reserve)
+        futures = []
+        while free.acquire() and (item := next(items, None)) is not None:
+            future = executor.submit(capture_item, item, pool, index, cache)
+            future.add_done_callback(lambda _: free.release())
+            futures.append(future)
+        for future in futures:
+            articles += future.result()
+            processed += 1
+    minutes = (perf_counter() - start) / 60
+    logger.info(
+        f"Captured {processed} items in {minutes:.2f} min "
+        f"({processed / minutes if minutes else 0:.1f} items/min)")
+    if PROFILE_WEBDRIVER:
+        path = profiler.export(OUTPUT_DIR, "capture_news", articles=articles)
+        logger.info(
+            f"WebDriver commands: {profiler.total} "
+            f"({profiler.total / max(articles, 1):.2f} per article), report in {path}")
 
 
 @task()
-def capture_news():
-    for item in workitems.inputs:
-        try:
-            fetch_news(item.payload)
-            workitems.outputs.create(item.payload)
-            item.done()
-        except Exception as e:
-            logger.error(f"Failed to process workitem: {e}")
-            item.fail(**exceptions.UnexpectedError(str(e)))
+def run_pipeline():
+    """
+    capture_news, fetch_data and store_data in a single process, for local runs.
+    The articles of each item stream from the result pages through enrichment
+    and picture downloads into the writer, pictures download while the next
+    pages load. Control Room keeps the three step process.
+    """
+    from src.utils.pipeline import ArticlePipeline
+
+    start, processed, articles = perf_counter(), 0, 0
+    with open_browser_pool() as pool, open_seen_index() as index, \
+            open_query_cache() as cache, open_downloader() as downloader, \
+            open_writer() as writer, ArticlePipeline(
+        downloader,
+        writer,
+        batch_size=PIPELINE_BATCH_SIZE,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        logger=logger
+    ) as pipeline:
+        for item in workitems.inputs:
+            try:
+                payload = item.payload
+                validate_payload(
+                    payload, ["search_phrase", "news_section", "number_months"])
+                found = find_articles(payload, pool, index, cache, open_checkpoint(item))
+                articles += pipeline.run(payload, found, item.id)
+                item.done()
+            except Exception as e:
+                logger.error(f"Failed to process workitem: {e}")
+                item.fail(**exceptions.UnexpectedError(str(e)))
+            processed += 1
+    minutes = (perf_counter() - start) / 60
+    logger.info(
+        f"Processed {processed} items ({articles} articles) in {minutes:.2f} min")
@@ -0,0 +1,80 @@
+from time import time
+from typing import List, Optional, Tuple
+import json
+import pathlib
+import re
+import shutil
+import uuid
+
+
+class CrawlCheckpoint:
+    """
+    Progress of the crawl of one work item: the articles collected so far
+    (appended page by page to `articles.jsonl`) and the paging position
+    (`state.json`, see `SearchResultPage.state`). A retry, or the same work
+    item queued again, continues from there instead of from page one.
+
+    The state is written after the articles of its page, so a crash between
+    the two only means a few articles are read again (and dropped as duplicates).
+
+    Args:
+        directory (pathlib.Path): Checkpoints are kept in `<directory>/<key>/`.
+        key (str): Work item id.
+        query (dict): What was searched (JSON serializable), saved with the
+            state. A checkpoint of another query under the same key is dropped:
+            work item ids repeat, e.g. the file adapter numbers them every run.
+        max_age (float): Seconds a checkpoint can be resumed from, older ones
+            are dropped (the date window moved on).
+    """
+
+    def __init__(self, directory: pathlib.Path, key: str, query: dict = None,
+                 max_age: float = 24 * 3600):
+        self.path = pathlib.Path(directory) / re.sub(r"[^\w.-]+", "_", str(key))
+        # as read back from the state
+        self.query = json.loads(json.dumps(query))
+        self.max_age = max_age
+
+    @property
+    def state_path(self) -> pathlib.Path:
+        return self.path / "state.json"
+
+    @property
+    def articles_path(self) -> pathlib.Path:
+        return self.path / "articles.jsonl"
+
+    def load(self) -> Tuple[Optional[dict], List[dict]]:
+        """ The last paging state and the articles collected up to it, (None, []) when there is none """
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, []
+        if time() - state["saved"] > self.max_age or state.get("query") != self.query:
+            self.clear()
+            return None, []
+
+        articles = []
+        with open(self.articles_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    articles.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # cut by a crash while it was written
+                    continue
+        return state, articles
+
+    def save(self, articles: List[dict], state: dict) -> None:
+        """ Append the articles of a page, then move the paging state past it """
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.articles_path, "a", encoding="utf-8") as file:
+            for article in articles:
+                file.write(json.dumps(article) + "\n")
+        # written aside and renamed, a crash never leaves half a state
+        tmp_path = self.path / f"state.{uuid.uuid4().hex}.part"
+        with open(tmp_path, "w") as file:
+            json.dump({**state, "query": self.query, "saved": time()}, file)
+        tmp_path.replace(self.state_path)
+
+    def clear(self) -> None:
+        """ Drop the checkpoint, the crawl is complete """
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,6 +1,11 @@
 from functools import wraps
 from .exceptions import *
 from typing import List, Tuple
+import os
+import psutil
+
+# Payload keys making up a search query, the same keys give the same articles
+QUERY_KEYS = ("search_phrase", "news_section", "number_months", "max_articles")
 
 
 def retry_on_error(max_retries=3, execept: Tuple[Exception] | Exception = Exception, logger=None):
@@ -33,3 +38,18 @@ def retry_on_error(max_retries=3, execept: Tuple[Exception] | Exception = Except
                 retries += 1
         return wrapper
     return decorator
+
+
+def default_worker_count(memory_per_worker: int, max_workers: int = None) -> int:
+    """
+    Number of workers the machine can hold, bounded by the CPUs
+    and by the memory currently available.
+
+    Args:
+        memory_per_worker (int): Expected peak memory of a worker in bytes.
+        max_workers (int): Optional upper bound.
+    """
+    by_cpu = os.cpu_count() or 1
+    by_memory = psutil.virtual_memory().available // memory_per_worker
+    count = max(1, min(by_cpu, by_memory))
+    return min(count, max_workers) if max_workers else count
@@ -0,0 +1,211 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .image_cache import ImageCache
+from .tracing import tracer
+import hashlib
+import mimetypes
+import pathlib
+import requests
+import shutil
+import threading
+import uuid
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    path: Optional[pathlib.Path] = None
+    size: int = 0
+    elapsed: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class DownloadSummary:
+    """ Counts of `download_all` calls, added up until `ImageDownloader.log_summary` """
+    pictures: int = 0
+    failed: int = 0
+    cached: int = 0
+    size: int = 0
+    elapsed: float = 0.0
+
+    def add(self, results: List[DownloadResult], elapsed: float) -> None:
+        self.pictures += len(results)
+        self.failed += sum(not r.ok for r in results)
+        self.cached += sum(r.cached for r in results)
+        self.size += sum(r.size for r in results)
+        self.elapsed += elapsed
+
+
+class ImageDownloader:
+    """
+    Downloads pictures concurrently over a shared keep-alive session.
+    Files are named after their content hash, so the same picture is written once.
+    Failures are logged as they happen, the counts of every `download_all`
+    call are added up and logged once by `log_summary` (e.g. per work item).
+
+    Args:
+        directory (pathlib.Path): Where the files are written.
+        max_workers (int): Maximum number of concurrent downloads.
+        per_host (int): Maximum number of concurrent downloads to the same host.
+        timeout (Tuple[float, float]): Connect and read timeout in seconds.
+        chunk_size (int): Bytes written to disk at a time, bodies are never fully buffered.
+        cache (ImageCache): Optional persistent cache, checked before downloading.
+        logger (Logger): Optional logger.
+    """
+    HASH_LENGTH = 32
+
+    def __init__(self, directory: pathlib.Path, max_workers: int = 8, per_host: int = 4,
+                 timeout: Tuple[float, float] = (5, 30), chunk_size: int = 64 * 1024,
+                 cache: ImageCache = None, logger: 'Logger' = None):
+        self.directory = pathlib.Path(directory)
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.logger = logger
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers,
+                              pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.__hosts: dict[str, threading.Semaphore] = {}
+        self.__hosts_lock = threading.Lock()
+        self.__summary = DownloadSummary()
+        self.__summary_lock = threading.Lock()
+
+    def __enter__(self) -> 'ImageDownloader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache:
+            self.cache.save()
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self.__hosts_lock:
+            if host not in self.__hosts:
+                self.__hosts[host] = threading.Semaphore(self.per_host)
+            return self.__hosts[host]
+
+    @staticmethod
+    def _extension(response: requests.Response) -> str:
+        content_type = response.headers.get(
+            "Content-Type", "").split(";")[0].strip()
+        return mimetypes.guess_extension(content_type) or ".png"
+
+    def _fetch(self, url: str, result: DownloadResult) -> pathlib.Path:
+        # Downloads `url` (or revalidates the cached copy) and returns where it is stored
+        headers = self.cache.validators(url) if self.cache else {}
+        directory = self.cache.directory if self.cache else self.directory
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 304 and self.cache:
+                path = self.cache.revalidated(url, response.headers)
+                if path:
+                    result.cached = True
+                    return path
+            response.raise_for_status()
+
+            # write to a temporary file so a failed download
+            # never leaves a truncated picture behind
+            tmp_path = directory / f"{uuid.uuid4().hex}.part"
+            digest = hashlib.sha256()
+            try:
+                with open(tmp_path, "wb") as file:
+                    for chunk in response.iter_content(self.chunk_size):
+                        file.write(chunk)
+                        digest.update(chunk)
+                        result.size += len(chunk)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            file_name = digest.hexdigest()[:self.HASH_LENGTH] + \
+                self._extension(response)
+
+        if self.cache:
+            return self.cache.store(url, tmp_path, file_name, response.headers)
+        path = directory / file_name
+        tmp_path.replace(path)
+        return path
+
+    def _materialize(self, path: pathlib.Path) -> pathlib.Path:
+        # Cached pictures are linked (or copied) into the output directory
+        target = self.directory / path.name
+        if path.parent.absolute() == self.directory.absolute() or target.exists():
+            return target
+        try:
+            target.hardlink_to(path)
+        except OSError:
+            shutil.copyfile(path, target)
+        return target
+
+    def download(self, url: str) -> DownloadResult:
+        """ Download a single picture, never raises """
+        result = DownloadResult(url=url)
+        if not url:
+            result.error = "No url"
+            return result
+
+        start = perf_counter()
+        with tracer.span("download_picture") as span:
+            try:
+                path = self.cache.lookup(url) if self.cache else None
+                if path:
+                    result.cached = True
+                else:
+                    with self._host_slot(url):
+                        path = self._fetch(url, result)
+                result.path = self._materialize(path).absolute()
+            except Exception as e:
+                result.error = str(e) or e.__class__.__name__
+            span.set(cached=result.cached, size=result.size, ok=result.ok)
+        result.elapsed = perf_counter() - start
+        return result
+
+    def download_all(self, urls: Iterable[str]) -> List[DownloadResult]:
+        """ Download all pictures, results are in the same order as `urls` """
+        urls = list(urls)
+        start = perf_counter()
+        # the same picture is often shared by several articles
+        unique = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            by_url = dict(zip(unique, pool.map(self.download, unique)))
+        results = [by_url[url] for url in urls]
+
+        with self.__summary_lock:
+            self.__summary.add(results, perf_counter() - start)
+        if self.logger:
+            for r in results:
+                if not r.ok:
+                    self.logger.error(f"Failed to download image: {r.url} ({r.error})")
+        return results
+
+    def log_summary(self) -> DownloadSummary:
+        """ Log the counts of the `download_all` calls since the last summary, and reset them """
+        with self.__summary_lock:
+            summary, self.__summary = self.__summary, DownloadSummary()
+        if self.logger:
+            self.logger.info(
+                f"Downloaded {summary.pictures - summary.failed}/{summary.pictures} pictures "
+                f"({summary.cached} from cache, {summary.size / 1024:.1f} KiB) "
+                f"in {summary.elapsed:.2f}s")
+        return summary
@@ -0,0 +1,73 @@
+from typing import Iterable, List
+import re
+import pandas as pd
+
+# Money formats: $11.1 | $111,111.11 | 11 dollars | 11 USD
+AMOUNT = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+MONEY_PATTERNS = {
+    "dollar_sign": rf"\$\s?(?:{AMOUNT})",
+    "dollars": rf"\b(?:{AMOUNT})\s+dollars?\b",
+    "usd": rf"\b(?:{AMOUNT})\s+USD\b",
+}
+
+
+def money_regex(formats: Iterable[str] = None) -> re.Pattern:
+    """ Single compiled pattern matching any of the money `formats` (all by default) """
+    formats = formats or MONEY_PATTERNS.keys()
+    return re.compile("|".join(f"(?:{MONEY_PATTERNS[f]})" for f in formats))
+
+
+def _strings(values: pd.Series) -> pd.Series:
+    # arrow backed strings run the str methods in C when pyarrow is installed
+    try:
+        return values.fillna("").astype("string[pyarrow]")
+    except (ImportError, TypeError):
+        return values.fillna("").astype(str)
+
+
+def enrich_articles(articles: List[dict], search_phrases: str | Iterable[str],
+                    money_formats: Iterable[str] = None) -> pd.DataFrame:
+    """
+    Count the search phrases and look for amounts of money in the title and
+    description of all the articles at once, updating the dicts in place.
+
+    Adds to each article:
+        search_phrase_occurrences (int): Occurrences of all the phrases (case insensitive).
+        phrase_occurrences (dict): Occurrences per phrase, only with several phrases.
+        has_amount (bool): Whether the title or description contains any amount of money.
+
+    Args:
+        articles (List[dict]): Articles with `title` and `description`.
+        search_phrases (str | Iterable[str]): One or more phrases to count.
+        money_formats (Iterable[str]): Keys of `MONEY_PATTERNS` to look for, all by default.
+
+    Returns:
+        pd.DataFrame: The computed columns, one row per article.
+    """
+    phrases = [search_phrases] if isinstance(
+        search_phrases, str) else list(search_phrases)
+    df = pd.DataFrame.from_records(articles, columns=["title", "description"])
+    # separator so a phrase is never matched across title and description
+    text = _strings(df["title"]) + "\n" + _strings(df["description"])
+    lower = text.str.lower()
+
+    result = pd.DataFrame(index=df.index)
+    counts = pd.DataFrame({
+        phrase: lower.str.count(re.escape(phrase.lower())).astype(int)
+        for phrase in phrases
+    }, index=df.index)
+    result["search_phrase_occurrences"] = counts.sum(axis=1).astype(int)
+    result["has_amount"] = text.str.contains(
+        money_regex(money_formats).pattern, regex=True).astype(bool)
+
+    # back into the payload dicts
+    occurrences = result["search_phrase_occurrences"].tolist()
+    has_amount = result["has_amount"].tolist()
+    per_phrase = list(zip(*(counts[p].tolist() for p in phrases))) \
+        if len(phrases) > 1 else None
+    for i, a in enumerate(articles):
+        a["search_phrase_occurrences"] = occurrences[i]
+        a["has_amount"] = has_amount[i]
+        if per_phrase:
+            a["phrase_occurrences"] = dict(zip(phrases, per_phrase[i]))
+    return result
@@ -34,3 +34,8 @@ class UnexpectedError(ApplicationException):
 class InvalidInput(BusinessException):
     code: str = "INVALID_INPUT"
     message: str = "Invalid input"
+
+
+class UnsupportedPage(ApplicationException):
+    code: str = "UNSUPPORTED_PAGE"
+    message: str = "Page can't be handled without a browser"
@@ -0,0 +1,164 @@
+from typing import TYPE_CHECKING, Optional
+from time import time
+import json
+import pathlib
+import threading
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class ImageCache:
+    """
+    Persistent, content addressed picture cache.
+
+    Pictures are stored once per content hash (`<sha256><ext>`) and indexed by url,
+    so the same picture is only downloaded once across work items and runs.
+    Cached urls are revalidated with ETag / Last-Modified once per run, and the
+    least recently used pictures are evicted when the cache grows over `max_bytes`.
+
+    Args:
+        directory (pathlib.Path): Where the pictures and the index are kept.
+        max_bytes (int): Maximum total size of the cached pictures.
+        logger (Logger): Optional logger, used for the hit/miss statistics.
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: pathlib.Path, max_bytes: int = 512 * 1024 * 1024,
+                 logger: 'Logger' = None):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.logger = logger
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evicted = 0
+
+        self.__lock = threading.Lock()
+        # urls already validated during this run, no need to ask the server again
+        self.__validated: set[str] = set()
+        self.__index: dict[str, dict] = self._load_index()
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.directory / self.INDEX_FILE
+
+    def _load_index(self) -> dict[str, dict]:
+        try:
+            with open(self.index_path) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _entry(self, url: str) -> Optional[dict]:
+        # only entries whose file is still on disk are usable
+        entry = self.__index.get(url)
+        if entry and (self.directory / entry["file"]).exists():
+            return entry
+        return None
+
+    def lookup(self, url: str) -> Optional[pathlib.Path]:
+        """ Cached picture for `url` if it was already validated in this run """
+        with self.__lock:
+            if url not in self.__validated:
+                return None
+            entry = self._entry(url)
+            if not entry:
+                return None
+            entry["last_used"] = time()
+            self.hits += 1
+            return self.directory / entry["file"]
+
+    def validators(self, url: str) -> dict[str, str]:
+        """ Conditional request headers for a cached `url` """
+        with self.__lock:
+            entry = self._entry(url)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, url: str, headers: dict) -> Optional[pathlib.Path]:
+        """ The server answered 304 Not Modified for `url` """
+        with self.__lock:
+            entry = self._entry(url)
+            if not entry:
+                return None
+            entry["etag"] = headers.get("ETag", entry.get("etag"))
+            entry["last_used"] = time()
+            self.__validated.add(url)
+            self.hits += 1
+            self.revalidations += 1
+            return self.directory / entry["file"]
+
+    def store(self, url: str, tmp_path: pathlib.Path, file_name: str, headers: dict) -> pathlib.Path:
+        """
+        Move a freshly downloaded picture into the cache.
+
+        Args:
+            tmp_path (pathlib.Path): Downloaded file, inside the cache directory.
+            file_name (str): Content addressed name (`<sha256><ext>`).
+            headers (dict): Response headers, for the validators.
+        """
+        path = self.directory / file_name
+        with self.__lock:
+            if path.exists():
+                # same content under another url (or another run)
+                tmp_path.unlink()
+            else:
+                tmp_path.replace(path)
+            self.__index[url] = {
+                "file": file_name,
+                "size": path.stat().st_size,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "last_used": time(),
+            }
+            self.__validated.add(url)
+            self.misses += 1
+        return path
+
+    def evict(self) -> None:
+        """ Remove least recently used pictures until the cache fits in `max_bytes` """
+        with self.__lock:
+            # a file can be shared by several urls
+            files: dict[str, dict] = {}
+            for entry in self.__index.values():
+                f = files.setdefault(
+                    entry["file"], {"size": entry["size"], "last_used": 0})
+                f["last_used"] = max(f["last_used"], entry["last_used"])
+
+            total = sum(f["size"] for f in files.values())
+            removed = set()
+            for name, f in sorted(files.items(), key=lambda i: i[1]["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                (self.directory / name).unlink(missing_ok=True)
+                removed.add(name)
+                total -= f["size"]
+
+            self.__index = {url: entry for url, entry in self.__index.items()
+                            if entry["file"] not in removed}
+            self.evicted += len(removed)
+
+    def save(self) -> None:
+        """ Evict, persist the index and log the statistics """
+        self.evict()
+        with self.__lock:
+            tmp_path = self.index_path.with_suffix(".part")
+            with open(tmp_path, "w") as file:
+                json.dump(self.__index, file)
+            tmp_path.replace(self.index_path)
+            size = sum({e["file"]: e["size"]
+                       for e in self.__index.values()}.values())
+
+        if self.logger:
+            total = self.hits + self.misses
+            self.logger.info(
+                f"Image cache: {self.hits}/{total} hits "
+                f"({self.revalidations} revalidated), {self.misses} misses, "
+                f"{self.evicted} evicted, {size / 1024 / 1024:.1f} MiB cached")
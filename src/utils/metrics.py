@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional
+import csv
+import pathlib
+import psutil
+import threading
+
+
+class HostSampler(threading.Thread):
+    """
+    Samples host and process metrics in the background every `interval` seconds,
+    so readers (e.g. the log patcher) only read the cached `values`.
+
+    Every sample is also appended to a CSV time series when `path` is given.
+
+    Args:
+        interval (float): Seconds between samples.
+        path (pathlib.Path): Optional CSV file for the time series.
+    """
+    FIELDS = ["time", "cpu", "mem", "disk", "rss_mb", "chrome_mb"]
+
+    def __init__(self, interval: float = 5.0, path: Optional[pathlib.Path] = None):
+        super().__init__(name="host-sampler", daemon=True)
+        self.interval = interval
+        self.path = path
+        self.process = psutil.Process()
+        self.values: dict[str, str] = {
+            "cpu": "", "mem": "", "disk": "", "rss": "", "chrome": ""}
+        self.__stop = threading.Event()
+        # first cpu_percent call only sets the reference point
+        psutil.cpu_percent(interval=None)
+        self.sample()
+
+    def _chrome_rss(self) -> int:
+        rss = 0
+        for child in self.process.children(recursive=True):
+            try:
+                if "chrom" in child.name().lower():
+                    rss += child.memory_info().rss
+            except psutil.Error:
+                # process went away between listing and reading it
+                continue
+        return rss
+
+    def sample(self) -> dict:
+        row = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "cpu": psutil.cpu_percent(interval=None),
+            "mem": psutil.virtual_memory().percent,
+            "disk": psutil.disk_usage('/').percent,
+            "rss_mb": round(self.process.memory_info().rss / 1024 / 1024, 1),
+            "chrome_mb": round(self._chrome_rss() / 1024 / 1024, 1),
+        }
+        # a new dict, readers never see a half updated one
+        self.values = {
+            "cpu": f"{row['cpu']}%",
+            "mem": f"{row['mem']}%",
+            "disk": f"{row['disk']}%",
+            "rss": f"{row['rss_mb']}MB",
+            "chrome": f"{row['chrome_mb']}MB",
+        }
+        return row
+
+    def run(self) -> None:
+        file = writer = None
+        if self.path:
+            new = not self.path.exists()
+            file = open(self.path, "a", newline="")
+            writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+            if new:
+                writer.writeheader()
+        try:
+            while not self.__stop.wait(self.interval):
+                row = self.sample()
+                if writer:
+                    writer.writerow(row)
+                    file.flush()
+        finally:
+            if file:
+                file.close()
+
+    def stop(self) -> None:
+        self.__stop.set()
+        if self.is_alive():
+            self.join()
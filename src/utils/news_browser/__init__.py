@@ -1,5 +1,10 @@
-from .base import NewsBrowser, Article
+from .base import NewsBrowser, Article, ArticleRecord
+from .pool import BrowserPool
+from .spool import ArticleSpool
+from .profiler import profiler
 from .models.aljaseera import AljazeeraBrowser as Aljazeera
+from .models.aljaseera_http import AljazeeraHttpBrowser as AljazeeraHttp
 from ..exceptions import *
 
-__all__ = ["Aljazeera", "NewsBrowser", "Article"]
+__all__ = ["Aljazeera", "AljazeeraHttp", "NewsBrowser", "Article", "ArticleRecord",
+           "ArticleSpool", "BrowserPool"]
@@ -6,22 +6,103 @@ from RPA.Browser.Selenium import (
     WebDriverWait,
 )
 from contextlib import contextmanager
+from functools import wraps
+from ..tracing import tracer
+from .profiler import profiler
 from RPA.core.webdriver import webdriver, WebDriver
 from RPA.Browser.Selenium import WebElement
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from time import time
+from urllib.parse import urlsplit
 import re
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
-from typing import List, TYPE_CHECKING, Generator, Any
+from typing import List, TYPE_CHECKING, Generator, Any, Iterable, Optional
 
 
 if TYPE_CHECKING:
     from loguru import Logger
-
-lib_selenium = Selenium()
+    from .network import NetworkMonitor
+    from ..seen_index import KnownArticles
+    from ..checkpoint import CrawlCheckpoint
 
 DEFAULT_WAIT_TIME = 10
+BLANK_URL = "about:blank"
+# a new chromedriver session starts on "data:,"
+BLANK_URLS = (BLANK_URL, "data:,")
+
+# Reads every `_XPATH_*` field of every article in a single round trip
+# arguments: root element, article xpath, [[field, xpath, property], ...],
+# index of the first article to read (previous ones were already parsed),
+# maximum number of articles to read, date cutoff {field, pattern, before}:
+# results are sorted by date, so reading stops at the first article
+# dated on/before the cutoff (it is still returned, to mark the end)
+JS_EXTRACT_ARTICLES = """
+const [root, articleXpath, fields, start, limit, cutoff] = arguments;
+const first = (ctx, xpath) => document.evaluate(
+    xpath, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const nodes = document.evaluate(
+    articleXpath, root || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const out = [];
+for (let i = start || 0; i < nodes.snapshotLength; i++) {
+    if (limit != null && out.length >= limit) break;
+    const data = {};
+    for (const [name, xpath, prop] of fields) {
+        const el = first(nodes.snapshotItem(i), xpath);
+        data[name] = el ? el[prop] : null;
+    }
+    out.push(data);
+    if (cutoff) {
+        const match = (data[cutoff.field] || "").match(new RegExp(cutoff.pattern));
+        if (match && Date.parse(match[0]) <= cutoff.before) break;
+    }
+}
+return out;
+"""
+
+# Event driven wait, for `execute_async_script`: optionally clicks an element,
+# then resolves as soon as more than `moreThan` nodes match `countXpath`
+# (the count before the click when null) or `goneXpath` is no longer displayed,
+# watching the DOM with a MutationObserver instead of polling
+# arguments: click target, count xpath, more than, gone xpath, timeout (ms), callback
+JS_WAIT_FOR = """
+const [target, countXpath, moreThan, goneXpath, loadingXpath, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+const count = () => document.evaluate(
+    `count(${countXpath})`, document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+const gone = () => {
+    if (!goneXpath) return false;
+    const el = document.evaluate(
+        goneXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return !el || el.offsetParent === null;
+};
+const loading = () => !!loadingXpath && !!document.evaluate(
+    loadingXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const baseline = moreThan == null ? count() : moreThan;
+let finished = false, timer = null;
+const observer = new MutationObserver(() => check());
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done({reason, count: count(), elapsed: (performance.now() - start) / 1000});
+};
+const check = () => {
+    if (count() > baseline) finish("count");
+    else if (gone() && !loading()) finish("gone");
+};
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(() => finish("timeout"), timeoutMs);
+if (target) {
+    target.scrollIntoView();
+    target.click();
+}
+check();
+"""
 
 
 class Article:
@@ -31,22 +112,59 @@ class Article:
     _XPATH_DESCRIPTION: str
     _XPATH_PICTURE: str
 
+    # Regex finding the date in the date field text, lets the
+    # batched extraction stop at the date cutoff in the browser
+    _DATE_PATTERN: str = None
+
+    # DOM property read for each `_XPATH_*` field on batched extraction,
+    # anything not listed here is read as text
+    _PROPERTIES: dict[str, str] = {"picture": "src", "url": "href"}
+
     title: str
     date: datetime
     description: str
     picture_url: str
     url: str
+    # False when a previous run already captured it, None without a seen index
+    is_new: bool = None
 
     element: WebElement
 
     def __init__(self, element: WebElement):
         self.element = element
 
+    @classmethod
+    def from_data(cls, data: dict) -> 'Article':
+        """
+        Build an article from plain data (e.g. the result of a batched
+        `execute_script` extraction) instead of a live WebElement.
+
+        Args:
+            data (dict): Raw values keyed by `_XPATH_*` field name
+                (title, url, date, description, picture).
+        """
+        article = cls.__new__(cls)
+        article.element = None
+        article.title = data.get("title")
+        article.url = data.get("url")
+        article.date = data.get("date")
+        article.description = data.get("description")
+        article.picture_url = data.get("picture")
+        return article
+
+    @classmethod
+    def xpaths(cls) -> dict[str, str]:
+        """ Field name -> xpath, taken from the `_XPATH_*` class attributes """
+        return {
+            name[len("_XPATH_"):].lower(): getattr(cls, name)
+            for name in dir(cls) if name.startswith("_XPATH_")
+        }
+
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} title='{self.title}'>"
 
     def __eq__(self, value: object) -> bool:
-        if not isinstance(value, Article):
+        if not isinstance(value, (Article, ArticleRecord)):
             return False
         return self.url == value.url and self.date == value.date
 
@@ -56,6 +174,13 @@ class Article:
     def __hash__(self) -> int:
         return hash(self.url)
 
+    @property
+    def section(self) -> Optional[str]:
+        """ First segment of the url path (e.g. `economy` for /economy/2024/...) """
+        if not self.url:
+            return None
+        return urlsplit(self.url).path.strip("/").split("/")[0].lower() or None
+
     @property
     def text(self) -> str:
         return self.element.text
@@ -78,21 +203,93 @@ class Article:
     def _get_picture(self) -> WebElement:
         return self.find_element(self._XPATH_PICTURE)
 
+    def to_dict(self) -> dict:
+        return self.record().to_dict()
+
+    def __dict__(self) -> dict:
+        return self.to_dict()
+
+    def record(self) -> 'ArticleRecord':
+        """ Compact copy of the fields, holding nothing of the driver """
+        return ArticleRecord(self.title, self.date, self.description,
+                             self.picture_url, self.url, self.is_new)
+
+    def detach(self) -> None:
+        """ Drop the element once the fields are read, it pins a browser side reference """
+        self.element = None
+
+
+class ArticleRecord:
+    """
+    What is kept of an article once read: plain fields in slots,
+    no element nor per instance dict. Equal (and hashed) by url like `Article`.
+    """
+    __slots__ = ("title", "date", "description", "picture_url", "url", "is_new")
+
+    def __init__(self, title: str, date: datetime, description: str,
+                 picture_url: str, url: str, is_new: bool = None):
+        self.title = title
+        self.date = date
+        self.description = description
+        self.picture_url = picture_url
+        self.url = url
+        self.is_new = is_new
+
+    section = Article.section
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} title='{self.title}'>"
+
+    def __eq__(self, value: object) -> bool:
+        if not isinstance(value, (Article, ArticleRecord)):
+            return False
+        return self.url == value.url and self.date == value.date
+
+    def __hash__(self) -> int:
+        return hash(self.url)
+
+    def record(self) -> 'ArticleRecord':
+        return self
+
     def to_dict(self) -> dict:
         return {
             "title": self.title,
             "description": self.description,
             "date": int(self.date.timestamp()),
             "picture_url": self.picture_url,
+            "url": self.url,
+            "is_new": self.is_new,
         }
 
-    def __dict__(self) -> dict:
-        return self.to_dict()
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ArticleRecord':
+        return cls(data["title"], datetime.fromtimestamp(data["date"]), data["description"],
+                   data["picture_url"], data["url"], data.get("is_new"))
 
 
 class SearchResultPage(WebDriver):
     handle: str
     has_news_section: bool = False
+    # set once an article older than the threshold shows up
+    # or `max_articles` were collected
+    finished: bool = False
+    collected: int = 0
+    # network usage per page, when the browser monitors it
+    network: 'NetworkMonitor' = None
+    # articles captured by previous runs, reaching them ends the search
+    known: 'KnownArticles' = None
+    # known articles read since the last new one, left out if they end the search
+    _held: tuple[Article | ArticleRecord, ...] = ()
+    # section name (and aliases) -> `Article.section`, what `select_section` accepts
+    SECTIONS: dict[str, str] = {}
+    # `Article.section` values kept, None for every section
+    sections: set[str] = None
+    # seconds spent in `wait_for`
+    wait_time: float = 0.0
+    # result page reached, `go_to_next_page` moves it forward
+    page: int = 1
+    # saves the progress after every page, see `state`
+    checkpoint: 'CrawlCheckpoint' = None
 
     __last_page: dict[WebDriver, str] = {}
 
@@ -118,9 +315,12 @@ class SearchResultPage(WebDriver):
         return self
 
     def __exit__(self, *args) -> None:
-        self.driver.close()
-
-        self.driver.switch_to.window(self.driver.window_handles[-1])
+        if len(self.driver.window_handles) > 1:
+            self.driver.close()
+            self.driver.switch_to.window(self.driver.window_handles[-1])
+        else:
+            # closing the last tab ends the session, it's reused by the next search
+            self.driver.get(BLANK_URL)
 
     def __repr__(self):
         return f"<{self.__class__.__name__} title='{self.driver.title}'>"
@@ -134,34 +334,267 @@ class SearchResultPage(WebDriver):
     def find_elements(self, value: str, by=By.XPATH) -> List['WebElement']:
         return self.driver.find_elements(by, value)
 
+    def wait_for(self, xpath: str, more_than: int = None, gone: str = None,
+                 loading: str = None, click: 'WebElement' = None,
+                 timeout: float = DEFAULT_WAIT_TIME) -> dict:
+        """
+        Wait on DOM changes instead of polling: returns as soon as more than
+        `more_than` elements match `xpath`, or `gone` is no longer displayed
+        while no `loading` element is present.
+        The wait time is added to `wait_time` and to the current tracing span.
+
+        Args:
+            xpath (str): Elements to count, e.g. the articles of the page.
+            more_than (int): Count to exceed, by default the count before `click`.
+            gone (str): Element whose removal also ends the wait (e.g. the "show more" button).
+            loading (str): Loading indicator, `gone` only counts once it is removed
+                (a site may hide the button while the next results load).
+            click (WebElement): Clicked right before waiting, in the same round trip.
+            timeout (float): Seconds before giving up.
+
+        Returns:
+            dict: `reason` ("count" or "gone"), `count` and `elapsed` seconds.
+
+        Raises:
+            TimeoutException: Nothing changed within `timeout`.
+        """
+        result = self.driver.execute_async_script(
+            JS_WAIT_FOR, click, xpath, more_than, gone, loading, int(timeout * 1000))
+        self.wait_time += result["elapsed"]
+        span = tracer.current()
+        if span is not None:
+            span.set(wait=round(result["elapsed"], 4), wait_reason=result["reason"])
+        if result["reason"] == "timeout":
+            raise TimeoutException(f"No change of '{xpath}' within {timeout}s")
+        return result
+
+    def extract_articles(self, article_cls: type[Article], article_xpath: str,
+                         root: 'WebElement' = None, start: int = 0,
+                         limit: int = None, cutoff: datetime = None) -> List[dict]:
+        """
+        Extract the raw fields of all articles matching `article_xpath`
+        with one `execute_script` call, instead of a `find_element` per field.
+
+        Args:
+            start (int): Index of the first article to extract, the ones
+                before it are skipped (already parsed).
+            limit (int): Maximum number of articles to extract.
+            cutoff (datetime): Stop after the first article dated on/before it.
+
+        Returns:
+            List[dict]: One dict per article, keyed by `_XPATH_*` field name.
+        """
+        fields = [
+            [name, xpath, article_cls._PROPERTIES.get(name, "innerText")]
+            for name, xpath in article_cls.xpaths().items()
+        ]
+        js_cutoff = None
+        if cutoff and article_cls._DATE_PATTERN:
+            js_cutoff = {"field": "date", "pattern": article_cls._DATE_PATTERN,
+                         "before": cutoff.timestamp() * 1000}
+        return self.driver.execute_script(
+            JS_EXTRACT_ARTICLES, root, article_xpath, fields, start, limit, js_cutoff) or []
+
+    @staticmethod
+    def cutoff(month_threshold: int = 1) -> datetime:
+        """ Articles dated on/before this are out of the `month_threshold` window """
+        # Example of how this should work: 0 or 1 - only the current month, 2 - current and previous month, 3 - current and two previous months, and so on
+        return datetime.now() - timedelta(days=30*int(month_threshold or 1) + 1)
+
+    def remaining(self, max_articles: int = None) -> Optional[int]:
+        """ How many articles are still to be collected, None for no limit """
+        if max_articles is None:
+            return None
+        return max(max_articles - self.collected, 0)
+
+    def filter_by_date(self, articles: Iterable[Article], month_threshold: int = 1,
+                       max_articles: int = None) -> List[Article]:
+        """
+        Keep articles until the first one older than `month_threshold` months
+        or until `max_articles` were collected, either one finishes the search.
+        Articles out of the selected `sections` are skipped.
+
+        With `known` articles, each one is marked new or not, and a run of
+        `known.stop_after` known articles also finishes the search: the
+        results are sorted by date, the rest was captured before.
+        Known articles are held back until a new one follows (an old article
+        bumped up), the run ending the search is left out.
+        """
+        cutoff = self.cutoff(month_threshold)
+        ars, held = [], list(self._held)
+        for a in articles:
+            if self.remaining(max_articles) == 0:
+                break
+            # first check if the article is in threshold
+            if a.date <= cutoff:
+                self.finished = True
+                break
+            if self.sections is not None and a.section not in self.sections:
+                continue
+            self.collected += 1
+            if self.known is None:
+                ars.append(a)
+                continue
+            a.is_new = a.url not in self.known
+            if not a.is_new:
+                held.append(a)
+                if len(held) >= self.known.stop_after:
+                    self.finished = True
+                    held.clear()
+                    break
+                continue
+            ars.extend(held)
+            held.clear()
+            ars.append(a)
+        if self.remaining(max_articles) == 0:
+            self.finished = True
+        if self.finished:
+            # the search ended on the date or `max_articles`, not on them
+            ars.extend(held)
+            held.clear()
+        self._held = tuple(held)
+        return ars
+
     def go_to_next_page(self) -> bool: ...
 
     def get_articles(self) -> List[Article]: raise NotImplementedError
 
-    def select_section(self, section: str) -> None: raise NotImplementedError
+    def iter_articles(self, *args, **kwargs) -> Generator['ArticleRecord', None, None]:
+        """
+        Yield the articles page by page, loading the next page
+        only after the current one is consumed.
+        Arguments are passed to `get_articles`, so the date threshold
+        and `max_articles` apply to every page.
+        Articles are yielded as compact records, detached from the page.
+        With a `checkpoint`, the articles and the paging `state` are saved
+        once each page is consumed.
+        Known articles still held back after the last page are yielded too.
+        """
+        while True:
+            with tracer.span("get_articles", page=self.page) as span:
+                articles = self.get_articles(*args, **kwargs)
+                span.set(articles=len(articles))
+            records = [article.record() for article in articles]
+            yield from records
+            if self.checkpoint is not None:
+                self.checkpoint.save([r.to_dict() for r in records], self.state())
+            with tracer.span("go_to_next_page", page=self.page) as span:
+                has_next = self.go_to_next_page()
+                span.set(loaded=bool(has_next))
+                if has_next and self.network:
+                    span.set(**self.network.collect())
+            if not has_next:
+                break
+        yield from (article.record() for article in self._held)
+        self._held = ()
+
+    def state(self) -> dict:
+        """ Paging position, what `restore` needs to continue from here """
+        return {"page": self.page, "collected": self.collected,
+                "held": [article.record().to_dict() for article in self._held]}
+
+    def restore(self, state: dict) -> None:
+        """
+        Continue from a `state` of a previous crawl of the same search,
+        replaying `go_to_next_page` up to its page (no article is read).
+        """
+        while self.page < state["page"] and self.go_to_next_page():
+            pass
+        self.collected = state["collected"]
+        self._held = tuple(map(ArticleRecord.from_dict, state.get("held", ())))
+
+    def select_section(self, section: str | List[str]) -> List[str]:
+        """
+        Keep only the articles of the given sections. Every section is
+        filtered in the same pass over the results, so several sections
+        cost the same as one and an article is never returned twice.
+
+        Args:
+            section (str | List[str]): Section name(s), see `SECTIONS`.
+
+        Returns:
+            List[str]: The requested sections the site doesn't have, ignored.
+                When none is known, articles of every section are kept.
+        """
+        if not self.has_news_section:
+            raise NotImplementedError
+        requested = [section] if isinstance(section, str) else list(section)
+        selected, unknown = set(), []
+        for name in requested:
+            key = name.strip().lower()
+            if key in self.SECTIONS:
+                selected.add(self.SECTIONS[key])
+            else:
+                unknown.append(name)
+        self.sections = selected or None
+        return unknown
 
 
 class NewsBrowser:
     wait: WebDriverWait
     driver: WebDriver
     logger: 'Logger'
-
-    def __init__(self, logger: 'Logger' = None, *args, **kwargs):
+    lib_selenium: Selenium
+    CONSENT_COOKIE = {"name": "cookieyes-consent", "value": "consent:yes,action:yes"}
+
+    def __init__(self, logger: 'Logger' = None, *args, url: str = None,
+                 profile: bool = False, **kwargs):
+        """
+        Args:
+            url (str): Site root, the consent cookie is set for it before
+                anything is opened, so the first navigation is the search itself.
+            profile (bool): Count and time every WebDriver command.
+        """
         logger.debug("Creating browser") if logger else None
 
-        lib_selenium.open_available_browser(
+        # One library per browser, a shared one would hand
+        # the same driver to every NewsBrowser in the process
+        self.lib_selenium = Selenium()
+        self.lib_selenium.open_available_browser(
             browser_selection="Chrome",
             *args, **kwargs)
 
-        self.driver = lib_selenium.driver
+        self.driver = self.lib_selenium.driver
+        if profile:
+            # count and time every WebDriver command
+            profiler.attach(self.driver)
         self.wait = WebDriverWait(self.driver, DEFAULT_WAIT_TIME)
         self.logger: 'Logger' = logger
-        self.driver.add_cookie(
-            {"name": "cookieyes-consent", "value": "consent:yes,action:yes"})
-        self.driver.refresh()
+        # before the first navigation, so it already applies to it
+        self.prepare()
+        if url:
+            self.set_consent(url)
+
+    def set_consent(self, url: str) -> None:
+        """ Accept the cookie banner of `url` without loading it """
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookie", {
+                **self.CONSENT_COOKIE, "url": url,
+                "expires": int(time()) + 365 * 24 * 60 * 60})
+        except (AttributeError, WebDriverException):
+            # no CDP, the cookie can only be set on a page of its domain,
+            # then the tab is left blank for the first search
+            self.driver.get(url)
+            self.driver.add_cookie(self.CONSENT_COOKIE)
+            self.driver.get(BLANK_URL)
+
+    def navigate(self, url: str) -> str:
+        """
+        Open `url` in the current tab when it's blank (fresh browser or
+        previous search done), in a new tab otherwise.
+
+        Returns:
+            str: Handle of the tab.
+        """
+        if self.driver.current_url not in BLANK_URLS:
+            self.driver.switch_to.new_window('tab')
+        self.driver.get(url)
+        return self.driver.current_window_handle
 
     @staticmethod
     def log(func):
+        # Runs the method inside a tracing span, and logs it when there is a logger
+        @wraps(func)
         def wrapper(*args, **kwargs):
             self = args[0]
             assert isinstance(
@@ -169,17 +602,19 @@ class NewsBrowser:
             if self.logger:
                 self.logger.debug(
                     f"Calling {func.__name__} with args: {args[1:]} {' and kwargs: ' + str(kwargs) if kwargs else ''}")
-                start = datetime.now()
-            res = func(*args, **kwargs)
+            with tracer.span(f"{self.__class__.__name__}.{func.__name__}") as span:
+                res = func(*args, **kwargs)
 
             if self.logger:
-                end = datetime.now()
                 self.logger.debug(
-                    f"Finished '{func.__name__}' in {end - start}")
+                    f"Finished '{func.__name__}' in {span.duration:.3f}s")
             return res
 
         return wrapper
 
+    def prepare(self) -> None:
+        """ Hook to set the browser up before the site is opened """
+
     @log
     def new_page(self, url: str) -> WebDriver: ...
 
@@ -190,6 +625,27 @@ class NewsBrowser:
         return self
 
     def __exit__(self, *args) -> None:
-        self.driver.quit()
-        if self.logger:
-            self.logger.debug("Quitting browser") if self.logger else None
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        """ Whether the browser still answers """
+        try:
+            return bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def reset(self) -> None:
+        """ Close every tab but the first one, leftovers of a failed search """
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+
+    def close(self) -> None:
+        try:
+            self.driver.quit()
+        finally:
+            if self.logger:
+                self.logger.debug("Quitting browser") if self.logger else None
@@ -1,4 +1,6 @@
 from ..base import NewsBrowser, Article, SearchResultPage
+from ..network import NetworkMonitor, LEAN_ARGUMENTS, LEAN_PREFERENCES, block_urls
+from ...tracing import tracer
 from RPA.core.webdriver import webdriver
 from typing import TYPE_CHECKING, List
 from RPA.Browser.Selenium import (
@@ -13,6 +15,25 @@ import re
 if TYPE_CHECKING:
     from RPA.core.webdriver import WebDriver
 
+BASE_URL = "https://www.aljazeera.com"
+# The site has no section filter on search, but the section is the
+# first segment of every article url (/economy/2024/5/1/...)
+SECTIONS = {
+    "news": "news",
+    "features": "features",
+    "feature": "features",
+    "economy": "economy",
+    "business": "economy",
+    "opinion": "opinions",
+    "opinions": "opinions",
+    "sport": "sports",
+    "sports": "sports",
+    "video": "video",
+    "gallery": "gallery",
+    "program": "program",
+    "podcasts": "podcasts",
+}
+
 
 class AjArticle(Article):
 
@@ -20,6 +41,8 @@ class AjArticle(Article):
     _XPATH_TITLE: str = ".//h3[@class='gc__title']"
     _XPATH_DESCRIPTION: str = ".//div[@class='gc__body-wrap']//p"
     _XPATH_PICTURE: str = ".//img"
+    _XPATH_URL: str = ".//h3[@class='gc__title']//a"
+    _DATE_PATTERN: str = r"(\d{1,2} \w{3} \d{4})"
 
     def __init__(self, element: WebElement):
         super().__init__(element)
@@ -28,6 +51,17 @@ class AjArticle(Article):
         self.description = self.get_description()
         self.picture_url = self.get_picture_url()
         self.url = self.get_url()
+        self.detach()
+
+    @classmethod
+    def from_data(cls, data: dict) -> 'AjArticle':
+        # raw values come straight from the DOM, so they need the same
+        # cleanup the per-element getters do
+        article = super().from_data(data)
+        article.title = article.title.strip() if article.title else None
+        article.date = cls.parse_date_text(data.get("date"))
+        article.description = cls.clean_description(data.get("description"))
+        return article
 
     def get_title(self) -> str:
         el = self._get_title()
@@ -35,24 +69,34 @@ class AjArticle(Article):
 
     @staticmethod
     def parse_date(el: WebElement) -> datetime:
+        return AjArticle.parse_date_text(el.text if el else None)
+
+    @staticmethod
+    def parse_date_text(text: str) -> datetime:
         try:
-            date_str = re.search(r"(\d{1,2} \w{3} \d{4})", el.text).group(0)
-        except AttributeError:
+            date_str = re.search(AjArticle._DATE_PATTERN, text).group(0)
+        except (AttributeError, TypeError):
             return None
         date = datetime.strptime(date_str, "%d %b %Y")
         return date
 
     def get_url(self) -> str:
-        return self._get_title().find_element(By.TAG_NAME, "a").get_attribute("href")
+        return self.find_element(self._XPATH_URL).get_attribute("href")
 
     def get_description(self) -> str:
         el = self._get_description()
 
         if not el:
             return None
+        return self.clean_description(el.text)
+
+    @staticmethod
+    def clean_description(text: str) -> str:
+        if not text:
+            return None
         # it comes with 'hour ago ...' at the beginning
         # and ' ...' at the end
-        return re.sub(r'(\d+\s+\w+\s+ago\s+...\s+...\s+(?=\w+))', '', el.text).rstrip('...').strip()
+        return re.sub(r'(\d+\s+\w+\s+ago\s+...\s+...\s+(?=\w+))', '', text).rstrip('...').strip()
 
     def get_picture_url(self) -> str:
         el = self._get_picture()
@@ -64,75 +108,151 @@ class AjSearchResultPage(SearchResultPage):
     XPATH_NEXT_PAGE_BUTTON = "//button[contains(@class, 'show-more-button')]"
     XPATH_LOADING_ELEMENT = "//div[contains(@class, 'show-more-button--loading')]"
     XPATH_RESULT_DIV = "//div[@class='search-result__list']"
-    has_news_section: bool = False
-    __finished: bool = False
+    has_news_section: bool = True
+    SECTIONS = SECTIONS
 
     def __init__(self, driver: 'WebDriver', handle: str):
         super().__init__(driver, handle)
+        # "show more" appends to the same list, so we keep
+        # how many articles were already parsed and skip them
+        self._cursor = 0
         # wait page to be loaded
-        self.wait.until(EC.presence_of_element_located(
-            (By.XPATH, self.XPATH_RESULT_DIV)))
+        self.wait_for(self.XPATH_RESULT_DIV, more_than=0)
+
+    @staticmethod
+    def article_xpath() -> str:
+        # Building article xpath
+        # This is a bit of a hack
+        # I'm getting all the xpaths from the AjArticle class
+        # and joining them with an 'and' operator
+        # to get the articles
+        # This is to avoid if the xpaths change in the future
+        # I can just change the xpaths in the AjArticle class
+        # and it will be reflected here
+        return f"//article[{' and '.join(AjArticle.xpaths().values())}]"
 
     def go_to_next_page(self) -> bool:
-        if self.__finished:
+        if self.finished:
             return 0
         btn = self.find_element(self.XPATH_NEXT_PAGE_BUTTON)
         if not btn:
             return 0
-        self.driver.execute_script(
-            "arguments[0].scrollIntoView();arguments[0].click()", btn)
-        self.wait.until(EC.invisibility_of_element_located(
-            (By.XPATH, self.XPATH_LOADING_ELEMENT)))
+        # done as soon as new articles show up, or the button goes away
+        # with nothing loading anymore (last page)
+        self.wait_for(self.article_xpath(), gone=self.XPATH_NEXT_PAGE_BUTTON,
+                      loading=self.XPATH_LOADING_ELEMENT, click=btn)
+        self.page += 1
         return 1
 
-    def get_articles(self, month_threshold: int = 1) -> List[dict]:
+    def state(self) -> dict:
+        return {**super().state(), "cursor": self._cursor}
+
+    def restore(self, state: dict) -> None:
+        # "show more" appends to the same list, it's replayed up to the
+        # page reached and the articles already read are skipped
+        super().restore(state)
+        self._cursor = state.get("cursor", 0)
 
+    def get_articles(self, month_threshold: int = 1, max_articles: int = None,
+                     batch: bool = True) -> List[AjArticle]:
+        """
+        Collect the articles appended to the page since the last call.
+
+        Args:
+            month_threshold (int): Number of months to keep, older articles stop the search.
+            max_articles (int): Stop the search once this many articles were collected.
+            batch (bool): Read every article in one `execute_script` round trip,
+                stopping at the date cutoff without reading the remaining ones.
+                When False, fall back to one `find_element` per field.
+        """
+        if self.finished:
+            return []
         div_result = self.find_element(self.XPATH_RESULT_DIV)
-        # Building article xpath
-        # This is a bit of a hack
-        # I'm getting all the xpaths from the AjArticle class
-        # and joining them with an 'and' operator
-        # to get the articles
-        # This is to avoid if the xpaths change in the future
-        # I can just change the xpaths in the AjArticle class
-        # and it will be reflected here
-        article_xpath = f"//article[{' and '.join(map(lambda a: getattr(AjArticle, a) ,filter(lambda x:'_XPATH' in x.upper(), dir(AjArticle))))}]"
-        # Getting articles
-        articles_els = div_result.find_elements(By.XPATH, article_xpath)
-        ars = []
-        for a in articles_els:
-            # first check if the article is in threshold
-            a_date = AjArticle.parse_date(
-                a.find_element(By.XPATH, AjArticle._XPATH_DATE))
-            # Example of how this should work: 0 or 1 - only the current month, 2 - current and previous month, 3 - current and two previous months, and so on
-            diff = datetime.now() - a_date
-            if diff.days > 30*(month_threshold or 1):
-                self.__finished = True
-                break
-            ars.append(AjArticle(a))
-        return ars
-        # return [AjArticle(article) for article in articles_els]
+        article_xpath = self.article_xpath()
+        if batch:
+            # with sections, some of the articles read are left out
+            limit = None if self.sections else self.remaining(max_articles)
+            data = self.extract_articles(
+                AjArticle, article_xpath, root=div_result, start=self._cursor,
+                limit=limit, cutoff=self.cutoff(month_threshold))
+            self._cursor += len(data)
+            articles = map(AjArticle.from_data, data)
+        else:
+            articles = self._iter_articles(div_result, article_xpath)
+
+        return self.filter_by_date(articles, month_threshold, max_articles)
+
+    def _iter_articles(self, div_result: WebElement, article_xpath: str):
+        # Per element path, one round trip per field
+        new_xpath = f"({article_xpath})[position() > {self._cursor}]"
+        for a in div_result.find_elements(By.XPATH, new_xpath):
+            self._cursor += 1
+            yield AjArticle(a)
 
 
 class AljazeeraBrowser(NewsBrowser):
-    __url: str = "https://www.aljazeera.com"
+    __url: str = BASE_URL
+    network: NetworkMonitor = None
 
-    def __init__(self, options=None, *args, **kwargs):
+    def __init__(self, options=None, *args, url: str = None, lean: bool = False,
+                 user_data_dir: str = None, profile: bool = False, **kwargs):
+        """
+        Args:
+            url (str): Points the browser to another host (e.g. a local fixture site).
+            lean (bool): Lean profile, no images, fonts, media, ads or trackers,
+                no extensions or background networking.
+            user_data_dir (str): Persistent Chrome profile, its cookies and
+                cache are reused by the next browser. One browser at a time.
+            profile (bool): Count and time every WebDriver command and, with
+                `lean`, record the network usage of every page in the trace.
+        """
+        self.url = url or self.__url
+        self.lean = lean
+        self.monitor_network = lean and profile
         if not options:
             options = webdriver.ChromeOptions()
             options.page_load_strategy = 'eager'
             options.add_argument("--disable-proxy-certificate-handler")
+            if user_data_dir:
+                options.add_argument(f"--user-data-dir={user_data_dir}")
+            if lean:
+                for argument in LEAN_ARGUMENTS:
+                    options.add_argument(argument)
+                options.add_experimental_option("prefs", LEAN_PREFERENCES)
+            if self.monitor_network:
+                options.set_capability(
+                    "goog:loggingPrefs", {"performance": "ALL"})
+
+        super().__init__(url=self.url, options=options, profile=profile, *args, **kwargs)
 
-        super().__init__(url=self.__url, options=options, *args, **kwargs)
+    def prepare(self) -> None:
+        if self.lean:
+            block_urls(self.driver)
+        if self.monitor_network:
+            # a performance log round trip per page, only when profiling
+            self.network = NetworkMonitor(self.driver)
 
     def new_page(self, url: str) -> AjSearchResultPage:
-        self.driver.switch_to.new_window('tab')
-        self.driver.get(url)
-        return AjSearchResultPage(self.driver, self.driver.current_window_handle)
+        page = AjSearchResultPage(self.driver, self.navigate(url))
+        if self.network:
+            page.network = self.network
+            # first page load, the next ones go to `go_to_next_page`
+            span = tracer.current()
+            if span is not None:
+                span.set(**self.network.collect())
+        return page
+
+    def close(self) -> None:
+        if self.network and self.logger:
+            totals = self.network.totals
+            self.logger.info(
+                f"Network: {totals['requests']} requests, {totals['blocked']} blocked, "
+                f"{totals['bytes'] / 1024 / 1024:.1f} MiB downloaded")
+        super().close()
 
     @NewsBrowser.log
     def search(self, search_phrase: str) -> AjSearchResultPage:
-        return self.new_page(url=f"{self.__url}/search/{search_phrase}?sort=date")
+        return self.new_page(url=f"{self.url}/search/{search_phrase}?sort=date")
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}>"
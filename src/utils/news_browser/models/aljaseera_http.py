@@ -0,0 +1,175 @@
+from ..base import NewsBrowser, Article, ArticleRecord, SearchResultPage
+from .aljaseera import AjArticle, AjSearchResultPage, BASE_URL, SECTIONS
+from ...exceptions import UnsupportedPage
+from typing import TYPE_CHECKING, Any, List
+from urllib.parse import urljoin
+from lxml import html
+import requests
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class AjHttpSearchResultPage(SearchResultPage):
+    """
+    Search result page fetched over plain HTTP and parsed with lxml,
+    using the same xpaths as the Selenium page. "Show more" is replaced
+    by requesting the next page of results.
+
+    Paging stops when the next page adds no article that wasn't seen yet,
+    in case the site ignores the page parameter.
+
+    Raises:
+        UnsupportedPage: The results are not in the HTML (rendered by JS),
+            a real browser is needed.
+    """
+    XPATH_NEXT_PAGE_BUTTON = AjSearchResultPage.XPATH_NEXT_PAGE_BUTTON
+    XPATH_RESULT_DIV = AjSearchResultPage.XPATH_RESULT_DIV
+    PAGE_PARAM = "page"
+    has_news_section: bool = True
+    SECTIONS = SECTIONS
+
+    def __init__(self, session: requests.Session, url: str, params: dict = None, timeout: float = 30):
+        self.session = session
+        self.url = url
+        self.params = params or {}
+        self.timeout = timeout
+        self.page = 1
+        self.driver = None
+        self.tree = self._load()
+        # an empty list is as likely a page rendered by JS as no results
+        self._urls = self._article_urls()
+        if self.find_element(self.XPATH_RESULT_DIV) is None or not self._urls:
+            raise UnsupportedPage(f"No search results in the HTML of {url}")
+
+    def __getattr__(self, name: str) -> Any:
+        # there is no driver to delegate to
+        raise AttributeError(name)
+
+    def __enter__(self) -> 'AjHttpSearchResultPage':
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} url='{self.url}' page={self.page}>"
+
+    def _load(self) -> html.HtmlElement:
+        params = {**self.params}
+        if self.page > 1:
+            params[self.PAGE_PARAM] = self.page
+        response = self.session.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return html.fromstring(response.content, base_url=response.url)
+
+    def _article_urls(self) -> set[str]:
+        xpath = f"{AjSearchResultPage.article_xpath()}{AjArticle._XPATH_URL[1:]}/@href"
+        return {urljoin(self.tree.base_url, href) for href in self.tree.xpath(xpath)}
+
+    def find_elements(self, value: str, by=None) -> List[html.HtmlElement]:
+        return self.tree.xpath(value)
+
+    def extract_articles(self, article_cls: type[Article], article_xpath: str,
+                         root: html.HtmlElement = None, start: int = 0) -> List[dict]:
+        """ Same output as the browser `extract_articles`, read with lxml """
+        root = root if root is not None else self.tree
+        out = []
+        for node in root.xpath(article_xpath)[start:]:
+            data = {}
+            for name, xpath in article_cls.xpaths().items():
+                el = next(iter(node.xpath(xpath)), None)
+                prop = article_cls._PROPERTIES.get(name)
+                if el is None:
+                    data[name] = None
+                elif prop:
+                    value = el.get(prop)
+                    data[name] = urljoin(self.tree.base_url, value) if value else None
+                else:
+                    data[name] = " ".join(el.text_content().split())
+            out.append(data)
+        return out
+
+    def go_to_next_page(self) -> bool:
+        if self.finished or self.find_element(self.XPATH_NEXT_PAGE_BUTTON) is None:
+            return 0
+        return self._load_page(self.page + 1)
+
+    def _load_page(self, page: int) -> bool:
+        """ Load result page `page`, a page with no new article finishes the search """
+        self.page = page
+        self.tree = self._load()
+        urls = self._article_urls()
+        if urls <= self._urls:
+            self.finished = True
+            return 0
+        self._urls |= urls
+        return 1
+
+    def state(self) -> dict:
+        # what the page reached brought, the next one must bring something else
+        return {**super().state(), "urls": sorted(self._article_urls())}
+
+    def restore(self, state: dict) -> None:
+        # every page has its own url, straight to the one after the page
+        # reached (its articles were all read)
+        self._urls = set(state.get("urls", ()))
+        try:
+            self._load_page(state["page"] + 1)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            # the page reached was the last one
+            self.finished = True
+        self.collected = state["collected"]
+        self._held = tuple(map(ArticleRecord.from_dict, state.get("held", ())))
+
+    def get_articles(self, month_threshold: int = 1, max_articles: int = None) -> List[AjArticle]:
+        """ Collect the articles of the current page """
+        if self.finished:
+            return []
+        data = self.extract_articles(
+            AjArticle, AjSearchResultPage.article_xpath(),
+            root=self.find_element(self.XPATH_RESULT_DIV))
+        return self.filter_by_date(
+            map(AjArticle.from_data, data), month_threshold, max_articles)
+
+
+class AljazeeraHttpBrowser(NewsBrowser):
+    """
+    Browserless Aljazeera search, a few MB per worker instead of a Chrome instance.
+    Searches raise `UnsupportedPage` when the results need JavaScript to show up.
+    """
+    __url: str = BASE_URL
+    USER_AGENT = (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+    def __init__(self, logger: 'Logger' = None, url: str = None, timeout: float = 30):
+        logger.debug("Creating HTTP browser") if logger else None
+        self.logger = logger
+        self.url = url or self.__url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = self.USER_AGENT
+        self.session.cookies.set("cookieyes-consent", "consent:yes,action:yes")
+
+    @property
+    def alive(self) -> bool:
+        return True
+
+    def reset(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.session.close()
+
+    def new_page(self, url: str, params: dict = None) -> AjHttpSearchResultPage:
+        return AjHttpSearchResultPage(self.session, url, params, timeout=self.timeout)
+
+    @NewsBrowser.log
+    def search(self, search_phrase: str) -> AjHttpSearchResultPage:
+        return self.new_page(url=f"{self.url}/search/{search_phrase}", params={"sort": "date"})
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}>"
@@ -0,0 +1,129 @@
+from .base import NewsBrowser
+from contextlib import contextmanager
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Generator
+import queue
+import threading
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class BrowserPool:
+    """
+    Keeps warm NewsBrowser instances to be reused across work items,
+    so Chrome startup is paid only once.
+
+    A browser is recycled (quit and replaced on the next lease)
+    after it crashes or after `max_uses` leases.
+
+    Leases are thread safe, `size` threads can each hold a browser.
+
+    Args:
+        factory (Callable[[int], NewsBrowser]): Creates a new browser, given
+            its slot (0 to `size - 1`, unique among the live browsers, e.g.
+            for a Chrome profile directory per slot).
+        size (int): Maximum number of browsers alive at the same time.
+        max_uses (int): Leases before a browser is recycled, 0 for no limit.
+        logger (Logger): Optional logger.
+    """
+
+    def __init__(self, factory: Callable[[int], NewsBrowser], size: int = 1,
+                 max_uses: int = 20, logger: 'Logger' = None):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.logger = logger
+
+        self.__idle: queue.LifoQueue[NewsBrowser] = queue.LifoQueue()
+        self.__slots = threading.BoundedSemaphore(size)
+        self.__uses: dict[NewsBrowser, int] = {}
+        self.__slot_of: dict[NewsBrowser, int] = {}
+        self.__free_slots = list(range(size - 1, -1, -1))
+        self.__lock = threading.Lock()
+
+    def __enter__(self) -> 'BrowserPool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _acquire(self) -> NewsBrowser:
+        while True:
+            try:
+                browser = self.__idle.get_nowait()
+            except queue.Empty:
+                with self.__lock:
+                    slot = self.__free_slots.pop()
+                try:
+                    browser = self.factory(slot)
+                except BaseException:
+                    with self.__lock:
+                        self.__free_slots.append(slot)
+                    raise
+                with self.__lock:
+                    self.__uses[browser] = 0
+                    self.__slot_of[browser] = slot
+                return browser
+            # it may have died while idle
+            if browser.alive:
+                browser.reset()
+                return browser
+            self._discard(browser)
+
+    def _release(self, browser: NewsBrowser) -> None:
+        with self.__lock:
+            self.__uses[browser] += 1
+            worn_out = self.max_uses and self.__uses[browser] >= self.max_uses
+        if worn_out:
+            if self.logger:
+                self.logger.debug(f"Recycling {browser} after {self.max_uses} uses")
+            self._discard(browser)
+        else:
+            self.__idle.put(browser)
+
+    def _discard(self, browser: NewsBrowser) -> None:
+        try:
+            browser.close()
+        except Exception:
+            pass
+        # the slot is free once the browser is closed
+        with self.__lock:
+            self.__uses.pop(browser, None)
+            if browser in self.__slot_of:
+                self.__free_slots.append(self.__slot_of.pop(browser))
+
+    @contextmanager
+    def lease(self) -> Generator[NewsBrowser, None, None]:
+        """ Borrow a browser, it goes back to the pool when done """
+        with self.__slots:
+            start = perf_counter()
+            warm = not self.__idle.empty()
+            browser = self._acquire()
+            if self.logger:
+                self.logger.info(
+                    f"Browser ready in {perf_counter() - start:.2f}s "
+                    f"({'warm' if warm else 'cold'} start)")
+            released = False
+            try:
+                yield browser
+                released = True
+            except Exception:
+                # the work failed, the browser may still be fine
+                released = browser.alive
+                if not released and self.logger:
+                    self.logger.warning(f"Recycling crashed browser {browser}")
+                raise
+            finally:
+                # anything else (e.g. GeneratorExit when a generator holding
+                # the lease is closed early) leaves it mid-page, never leak it
+                if released:
+                    self._release(browser)
+                else:
+                    self._discard(browser)
+
+    def close(self) -> None:
+        with self.__lock:
+            browsers = list(self.__uses)
+        for browser in browsers:
+            self._discard(browser)
@@ -0,0 +1,133 @@
+from ..tracing import tracer
+from datetime import datetime
+from time import perf_counter
+from typing import TYPE_CHECKING
+import json
+import pathlib
+import sys
+import threading
+
+if TYPE_CHECKING:
+    from RPA.core.webdriver import WebDriver
+
+SRC_DIR = pathlib.Path(__file__).parents[2]
+
+# window handle lookups are redundant until one of these changes the window
+WINDOW_HANDLE_COMMANDS = {"w3cGetCurrentWindowHandle", "getCurrentWindowHandle"}
+WINDOW_CHANGE_COMMANDS = {"switchToWindow", "newWindow", "close", "quit"}
+
+
+class CommandProfiler:
+    """
+    Opt-in instrumentation counting and timing every WebDriver command,
+    by command, by call site (first frame in our code) and by result page
+    (the `page` attribute of the current tracing span).
+
+    Window handle lookups made while the window can't have changed
+    (e.g. on every `SearchResultPage.__getattr__`) are flagged as redundant.
+
+    Usage:
+        profiler.attach(browser.driver)
+        ...
+        profiler.export(OUTPUT_DIR, "capture_news", articles=120)
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.started = datetime.now()
+            self.commands: dict[str, dict] = {}
+            self.call_sites: dict[str, dict] = {}
+            self.pages: dict[str, dict] = {}
+            self.redundant: dict[str, int] = {}
+            self.__handle_known: dict[int, bool] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(c["count"] for c in self.commands.values())
+
+    def attach(self, driver: 'WebDriver') -> None:
+        """ Wrap `driver.execute`, the single point every command goes through """
+        if getattr(driver.execute, "__profiled__", False):
+            return
+        execute = driver.execute
+
+        def wrapper(driver_command, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return execute(driver_command, *args, **kwargs)
+            finally:
+                self.record(driver, driver_command, perf_counter() - start)
+
+        wrapper.__profiled__ = True
+        driver.execute = wrapper
+
+    @staticmethod
+    def _call_site() -> str:
+        # first frame in our code, outside of this module
+        frame = sys._getframe(3)
+        while frame is not None:
+            path = pathlib.Path(frame.f_code.co_filename)
+            if path != pathlib.Path(__file__) and SRC_DIR in path.parents:
+                return f"{path.relative_to(SRC_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})"
+            frame = frame.f_back
+        return "<external>"
+
+    @staticmethod
+    def _add(stats: dict, key: str, elapsed: float) -> None:
+        entry = stats.setdefault(key, {"count": 0, "time": 0.0})
+        entry["count"] += 1
+        entry["time"] += elapsed
+
+    def record(self, driver: 'WebDriver', command: str, elapsed: float) -> None:
+        site = self._call_site()
+        page = str(tracer.attribute("page", "-"))
+        with self.__lock:
+            self._add(self.commands, command, elapsed)
+            self._add(self.call_sites, f"{command} @ {site}", elapsed)
+            self._add(self.pages, page, elapsed)
+
+            if command in WINDOW_HANDLE_COMMANDS:
+                if self.__handle_known.get(id(driver)):
+                    self.redundant[site] = self.redundant.get(site, 0) + 1
+                self.__handle_known[id(driver)] = True
+            elif command in WINDOW_CHANGE_COMMANDS:
+                self.__handle_known[id(driver)] = False
+
+    def report(self, articles: int = None) -> dict:
+        def ranked(stats: dict) -> dict:
+            return {
+                key: {"count": v["count"], "time": round(v["time"], 6)}
+                for key, v in sorted(stats.items(), key=lambda i: -i[1]["count"])
+            }
+
+        with self.__lock:
+            total = self.total
+            return {
+                "started": self.started.isoformat(),
+                "total_commands": total,
+                "total_time": round(sum(c["time"] for c in self.commands.values()), 6),
+                "articles": articles,
+                "commands_per_article": round(total / articles, 3) if articles else None,
+                "redundant_commands": sum(self.redundant.values()),
+                "redundant": dict(sorted(self.redundant.items(), key=lambda i: -i[1])),
+                "commands": ranked(self.commands),
+                "pages": ranked(self.pages),
+                "call_sites": ranked(self.call_sites),
+            }
+
+    def export(self, directory: pathlib.Path, name: str, articles: int = None) -> pathlib.Path:
+        """ Write the report to `<directory>/webdriver_<name>_<time>.json` """
+        path = pathlib.Path(directory) / \
+            f"webdriver_{name}_{self.started:%Y%m%d_%H%M%S}.json"
+        with open(path, "w") as file:
+            json.dump(self.report(articles), file, indent=2)
+        return path
+
+
+# One profiler per process, attached to browsers on demand
+profiler = CommandProfiler()
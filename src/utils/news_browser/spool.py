@@ -0,0 +1,86 @@
+from .base import ArticleRecord
+from typing import Iterator, Optional
+import json
+import os
+import pathlib
+import tempfile
+
+
+class ArticleSpool:
+    """
+    The unique articles of a crawl, in memory up to `max_in_memory`, then
+    appended to a JSONL file, so capture memory stays bounded however
+    many pages a query spans. Only a hash per article stays in memory
+    to tell duplicates apart.
+
+    Iterates in insertion order, from the file first.
+
+    Args:
+        max_in_memory (int): Articles kept in memory before spilling them.
+        directory (pathlib.Path): Where the spill file goes, the system
+            temporary directory by default. It is removed on `close`.
+    """
+
+    def __init__(self, max_in_memory: int = 1000, directory: pathlib.Path = None):
+        self.max_in_memory = max_in_memory
+        self.directory = directory
+        self.spilled = 0
+        self.__memory: list[ArticleRecord] = []
+        self.__seen: set[int] = set()
+        self.__file = None
+        self.path: Optional[pathlib.Path] = None
+
+    def __enter__(self) -> 'ArticleSpool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.__seen)
+
+    @staticmethod
+    def _key(article: ArticleRecord) -> int:
+        return hash(article.url or (article.title, article.date))
+
+    def __contains__(self, article: ArticleRecord) -> bool:
+        return self._key(article) in self.__seen
+
+    def add(self, article: ArticleRecord) -> bool:
+        """ Keep the article, False when it was already there """
+        key = self._key(article)
+        if key in self.__seen:
+            return False
+        self.__seen.add(key)
+        self.__memory.append(article)
+        if len(self.__memory) >= self.max_in_memory:
+            self._spill()
+        return True
+
+    def _spill(self) -> None:
+        if self.__file is None:
+            if self.directory:
+                pathlib.Path(self.directory).mkdir(parents=True, exist_ok=True)
+            fd, path = tempfile.mkstemp(
+                prefix="articles_", suffix=".jsonl", dir=self.directory)
+            self.path = pathlib.Path(path)
+            self.__file = os.fdopen(fd, "w", encoding="utf-8")
+        for article in self.__memory:
+            self.__file.write(json.dumps(article.to_dict()) + "\n")
+        self.spilled += len(self.__memory)
+        self.__memory = []
+
+    def __iter__(self) -> Iterator[ArticleRecord]:
+        if self.__file is not None:
+            self.__file.flush()
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    yield ArticleRecord.from_dict(json.loads(line))
+        yield from list(self.__memory)
+
+    def close(self) -> None:
+        self.__memory = []
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,217 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Generator, Iterable, List
+from .downloader import DownloadResult, ImageDownloader
+from .enrichment import enrich_articles
+from .tracing import tracer
+from .writers import ArticleWriter, query_name
+import queue
+import threading
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+# Marks the end of the articles of a query in a queue
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """ Another stage of the pipeline failed """
+
+
+class ArticlePipeline:
+    """
+    Streams the articles of a query, as they are scraped, through enrichment,
+    picture downloads and the writer, instead of going through a work item
+    between each step. Pictures are downloaded while the next pages load.
+
+    Stages run in their own threads, connected by bounded queues so a slow
+    stage holds back the ones before it instead of piling articles up.
+
+        scrape (caller) -> enrich (batches) -> download (thread pool) -> write
+
+    Args:
+        downloader (ImageDownloader): Downloads the pictures, its `max_workers`
+            sizes the download pool.
+        writer (ArticleWriter): Where the articles end up.
+        batch_size (int): Maximum articles enriched at once.
+        queue_size (int): Maximum articles waiting between two stages.
+        logger (Logger): Optional logger.
+    """
+
+    def __init__(self, downloader: ImageDownloader, writer: ArticleWriter,
+                 batch_size: int = 20, queue_size: int = 100,
+                 logger: 'Logger' = None):
+        self.downloader = downloader
+        self.writer = writer
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.logger = logger
+        self.__pool = ThreadPoolExecutor(
+            max_workers=downloader.max_workers, thread_name_prefix="download")
+
+    def __enter__(self) -> 'ArticlePipeline':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__pool.shutdown(wait=True)
+
+    def run(self, payload: dict, articles: Iterable[dict], item_id: str = None) -> int:
+        """
+        Run the articles of one query through every stage.
+
+        Args:
+            payload (dict): Work item payload, `search_phrase` and the
+                optional `money_formats` are used to enrich the articles.
+            articles (Iterable[dict]): Articles as they are scraped.
+            item_id (str): Work item id, part of the file names.
+
+        Returns:
+            int: Number of articles written.
+
+        Raises:
+            Exception: The first error of any stage, the others stop.
+        """
+        run = _Run(self, payload, item_id)
+        with tracer.span("pipeline", query=run.name) as span:
+            run.start()
+            try:
+                for article in articles:
+                    run.put(run.enrich_queue, article)
+                run.put(run.enrich_queue, _DONE)
+            except BaseException as e:
+                run.abort(e)
+            run.join()
+            span.set(articles=run.written, pictures=len(run.downloads))
+        if run.error:
+            raise run.error
+
+        if self.logger:
+            results: List[DownloadResult] = [
+                f.result() for f in run.downloads.values()]
+            failed = sum(not r.ok for r in results)
+            self.logger.info(
+                f"Pipeline '{run.name}': {run.written} articles, "
+                f"{len(results) - failed}/{len(results)} pictures "
+                f"({sum(r.cached for r in results)} from cache) "
+                f"in {perf_counter() - run.started:.2f}s")
+        return run.written
+
+    def submit_download(self, url: str) -> Future:
+        return self.__pool.submit(self.downloader.download, url)
+
+
+class _Run:
+    # State and stage threads of one `ArticlePipeline.run`
+    def __init__(self, pipeline: ArticlePipeline, payload: dict, item_id: str = None):
+        self.pipeline = pipeline
+        self.payload = payload
+        self.item_id = item_id
+        self.name = query_name(payload)
+        self.started = perf_counter()
+        self.enrich_queue: queue.Queue = queue.Queue(pipeline.queue_size)
+        self.write_queue: queue.Queue = queue.Queue(pipeline.queue_size)
+        self.downloads: dict[str, Future] = {}
+        self.written = 0
+        self.error: BaseException = None
+        self.__aborted = threading.Event()
+        self.__threads = [
+            threading.Thread(target=self.stage, args=(self.enrich,),
+                             name="pipeline-enrich", daemon=True),
+            threading.Thread(target=self.stage, args=(self.write,),
+                             name="pipeline-write", daemon=True),
+        ]
+
+    def start(self) -> None:
+        for thread in self.__threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self.__threads:
+            thread.join()
+
+    def abort(self, error: BaseException) -> None:
+        # the first error wins, the others are a consequence of it
+        if not self.__aborted.is_set():
+            self.error = error
+            self.__aborted.set()
+
+    def put(self, q: queue.Queue, item: Any) -> None:
+        while True:
+            if self.__aborted.is_set():
+                raise PipelineAborted()
+            try:
+                return q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+
+    def get(self, q: queue.Queue) -> Any:
+        while True:
+            if self.__aborted.is_set():
+                raise PipelineAborted()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def stage(self, target) -> None:
+        try:
+            target()
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self.abort(e)
+
+    def batches(self) -> Generator[List[dict], None, None]:
+        """ Articles in batches of what is already waiting, up to `batch_size` """
+        while True:
+            article = self.get(self.enrich_queue)
+            if article is _DONE:
+                return
+            batch = [article]
+            while len(batch) < self.pipeline.batch_size:
+                try:
+                    article = self.enrich_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if article is _DONE:
+                    yield batch
+                    return
+                batch.append(article)
+            yield batch
+
+    def enrich(self) -> None:
+        for batch in self.batches():
+            with tracer.span("enrich_articles", articles=len(batch)):
+                enrich_articles(batch, self.payload["search_phrase"],
+                                money_formats=self.payload.get("money_formats"))
+            for article in batch:
+                url = article.get("picture_url")
+                # the same picture is often shared by several articles
+                if url and url not in self.downloads:
+                    self.downloads[url] = self.pipeline.submit_download(url)
+                self.put(self.write_queue, (article, self.downloads.get(url)))
+        self.put(self.write_queue, _DONE)
+
+    def downloaded(self) -> Generator[dict, None, None]:
+        """ Articles in order, each one once its picture is downloaded """
+        while True:
+            item = self.get(self.write_queue)
+            if item is _DONE:
+                return
+            article, download = item
+            if download is not None:
+                result: DownloadResult = download.result()
+                if result.ok:
+                    article["image_path"] = str(result.path)
+                elif self.pipeline.logger:
+                    self.pipeline.logger.error(
+                        f"Failed to download image: {result.url} ({result.error})")
+            self.written += 1
+            yield article
+
+    def write(self) -> None:
+        self.pipeline.writer.write(self.name, self.downloaded(), item_id=self.item_id)
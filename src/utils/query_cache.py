@@ -0,0 +1,159 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from time import time
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, List, Optional
+from .seen_index import query_key
+import hashlib
+import json
+import pathlib
+import threading
+import uuid
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+@dataclass
+class CachedResult:
+    articles: List[dict]
+    stored: float
+    fresh: bool
+
+
+class QueryCache:
+    """
+    On disk cache of search results (`Article.to_dict()` lists), keyed by
+    the normalized query, so repeated queries across work items and batches
+    don't search again.
+
+    Results younger than `ttl` are fresh. Up to `ttl + stale_ttl` they are
+    stale: still served right away, while `revalidate` refreshes them in
+    the background for the next time (stale-while-revalidate).
+
+    Args:
+        directory (pathlib.Path): One JSON file per query is kept here.
+        ttl (float): Seconds a result is fresh.
+        stale_ttl (float): Seconds a result is served stale after `ttl`.
+        site (str): Part of the key, results of another site (e.g. the
+            fixture site) never mix.
+        logger (Logger): Optional logger, used for the hit/miss statistics.
+    """
+
+    def __init__(self, directory: pathlib.Path, ttl: float = 3600, stale_ttl: float = 6 * 3600,
+                 site: str = None, logger: 'Logger' = None):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.site = site
+        self.logger = logger
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self.__lock = threading.Lock()
+        self.__pending: dict[str, Future] = {}
+        self.__executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="revalidate")
+
+    def __enter__(self) -> 'QueryCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # pending revalidations still use the browser, wait for them
+        self.__executor.shutdown(wait=True)
+        if self.logger:
+            self.logger.info(
+                f"Query cache: {self.hits} hits ({self.stale_hits} stale), "
+                f"{self.misses} misses, {self.revalidations} revalidations")
+
+    def stats(self) -> dict[str, int]:
+        with self.__lock:
+            return {"hits": self.hits, "stale_hits": self.stale_hits,
+                    "misses": self.misses, "revalidations": self.revalidations}
+
+    def key(self, payload: dict) -> str:
+        # months 0 and 1 are the same window
+        query = [query_key(payload["search_phrase"], payload.get("news_section")),
+                 int(payload.get("number_months") or 1), payload.get("max_articles"),
+                 self.site]
+        return hashlib.sha1(json.dumps(query).encode()).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, payload: dict) -> Optional[CachedResult]:
+        """ Cached result of the query, None when missing or expired """
+        path = self._path(self.key(payload))
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+
+        age = time() - entry["stored"] if entry else None
+        with self.__lock:
+            if entry is None or age > self.ttl + self.stale_ttl:
+                self.misses += 1
+                result = None
+            else:
+                fresh = age <= self.ttl
+                self.hits += 1
+                self.stale_hits += not fresh
+                result = CachedResult(entry["articles"], entry["stored"], fresh)
+        if entry is not None and result is None:
+            path.unlink(missing_ok=True)
+        return result
+
+    def put(self, payload: dict, articles: Iterable[dict]) -> None:
+        deque(self.recording(payload, articles), maxlen=0)
+
+    def recording(self, payload: dict, articles: Iterable[dict]) -> Generator[dict, None, None]:
+        """
+        Yield `articles`, each one written to the cache file as it goes
+        (nothing is kept in memory), stored once they were all consumed.
+        """
+        path = self._path(self.key(payload))
+        # written aside and renamed, readers never see half a file
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.part")
+        try:
+            with open(tmp_path, "w") as file:
+                file.write('{"articles": [')
+                for i, article in enumerate(articles):
+                    # written before the consumer may change the article,
+                    # `is_new` depends on the seen index of each run
+                    cached = {k: v for k, v in article.items() if k != "is_new"}
+                    file.write(f"{', ' if i else ''}{json.dumps(cached)}")
+                    yield article
+                file.write(f'], "stored": {time()}}}')
+            tmp_path.replace(path)
+        finally:
+            # the articles were not all consumed
+            tmp_path.unlink(missing_ok=True)
+
+    def revalidate(self, payload: dict, search: Callable[[], Iterable[dict]]) -> None:
+        """ Refresh the result of the query in the background with `search()` """
+        key = self.key(payload)
+        with self.__lock:
+            if key in self.__pending:
+                return
+            self.revalidations += 1
+            self.__pending[key] = self.__executor.submit(
+                self._revalidate, key, dict(payload), search)
+
+    def _revalidate(self, key: str, payload: dict, search: Callable[[], Iterable[dict]]) -> None:
+        try:
+            self.put(payload, search())
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(
+                    f"Failed to revalidate '{payload['search_phrase']}': {e}")
+        finally:
+            with self.__lock:
+                self.__pending.pop(key, None)
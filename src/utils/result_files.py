@@ -0,0 +1,129 @@
+from typing import Generator, Iterable, List
+import gzip
+import json
+import pathlib
+
+# Payload key of the manifest, replacing the inline `search_result`
+RESULT_FILE_KEY = "search_result_file"
+FILE_NAMES = {
+    "jsonl": "search_result.jsonl.gz",
+    "parquet": "search_result.parquet",
+}
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    # captured fields, then the ones added by fetch_data
+    return pa.schema([
+        ("title", pa.string()),
+        ("date", pa.int64()),
+        ("description", pa.string()),
+        ("picture_url", pa.string()),
+        ("url", pa.string()),
+        ("is_new", pa.bool_()),
+        ("image_path", pa.string()),
+        ("search_phrase_occurrences", pa.int64()),
+        ("phrase_occurrences", pa.map_(pa.string(), pa.int64())),
+        ("has_amount", pa.bool_()),
+    ])
+
+
+class ResultFileWriter:
+    """
+    Writes the articles of a work item to a file attached to the next one,
+    so only a small manifest goes in the payload instead of every article.
+
+    - `jsonl`: gzipped JSON lines, standard library only, any field.
+    - `parquet`: zstd compressed, written in row groups of `batch_size`,
+      fields outside the schema are dropped.
+
+    Usage:
+        with ResultFileWriter(tmp_dir, "parquet") as file:
+            file.extend(articles)
+        payload[RESULT_FILE_KEY] = file.manifest
+        workitems.outputs.create(payload, files=[file.path])
+
+    Args:
+        directory (pathlib.Path): Where the file is written.
+        format (str): `jsonl` or `parquet`.
+        batch_size (int): Rows per Parquet row group.
+    """
+
+    def __init__(self, directory: pathlib.Path, format: str = "jsonl",
+                 batch_size: int = 1000):
+        if format not in FILE_NAMES:
+            raise ValueError(
+                f"Unknown result file format '{format}', expected one of {list(FILE_NAMES)}")
+        self.format = format
+        self.path = pathlib.Path(directory) / FILE_NAMES[format]
+        self.batch_size = batch_size
+        self.count = 0
+        self.__rows: List[dict] = []
+        if format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self.__pa = pa
+            self.__schema = _parquet_schema()
+            self.__file = pq.ParquetWriter(
+                self.path, self.__schema, compression="zstd")
+        else:
+            self.__file = gzip.open(self.path, "wt", encoding="utf-8")
+
+    def __enter__(self) -> 'ResultFileWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def manifest(self) -> dict:
+        return {"name": self.path.name, "format": self.format, "articles": self.count}
+
+    def append(self, article: dict) -> None:
+        self.count += 1
+        if self.format == "jsonl":
+            self.__file.write(json.dumps(article) + "\n")
+            return
+        self.__rows.append(article)
+        if len(self.__rows) >= self.batch_size:
+            self.flush()
+
+    def extend(self, articles: Iterable[dict]) -> None:
+        for article in articles:
+            self.append(article)
+
+    def flush(self) -> None:
+        if self.__rows:
+            self.__file.write_table(self.__pa.Table.from_pylist(
+                self.__rows, schema=self.__schema))
+            self.__rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self.__file.close()
+
+
+def read_result_file(path: pathlib.Path, format: str,
+                     batch_size: int = 1000) -> Generator[dict, None, None]:
+    """
+    Articles of a result file, one at a time: JSON lines are decompressed as
+    they are read, the Parquet file is memory mapped and decoded a row group
+    batch at a time.
+    """
+    if format == "jsonl":
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+        return
+
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(path, memory_map=True) as file:
+        for batch in file.iter_batches(batch_size=batch_size):
+            for article in batch.to_pylist():
+                # maps come back as (key, value) pairs
+                if article.get("phrase_occurrences") is not None:
+                    article["phrase_occurrences"] = dict(article["phrase_occurrences"])
+                yield article
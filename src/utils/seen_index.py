@@ -0,0 +1,150 @@
+from time import time
+from typing import TYPE_CHECKING, Generator, Iterable
+import json
+import pathlib
+import re
+import sqlite3
+import threading
+
+if TYPE_CHECKING:
+    from loguru import Logger
+    from .news_browser import Article
+
+
+def query_key(search_phrase: str, news_section: str | list = None) -> str:
+    """
+    Key of a query in the index, the month window is left out:
+    an article seen with a 1 month window was also seen with a 3 months one.
+    """
+    def normalize(value: str | list) -> str:
+        if value and not isinstance(value, str):
+            value = ",".join(sorted(value))
+        return re.sub(r"\s+", " ", (value or "").strip().lower())
+    return json.dumps([normalize(search_phrase), normalize(news_section)])
+
+
+class KnownArticles:
+    """
+    Articles of one query already in the index, see `SeenIndex.query`.
+
+    Args:
+        index (SeenIndex): The index.
+        key (str): Query key.
+        stop_after (int): Consecutive known articles that end the search.
+    """
+
+    def __init__(self, index: 'SeenIndex', key: str, stop_after: int):
+        self.index = index
+        self.key = key
+        self.stop_after = stop_after
+
+    def __contains__(self, url: str) -> bool:
+        return url is not None and self.index.contains(self.key, url)
+
+    def add(self, articles: Iterable['Article']) -> int:
+        return self.index.add(self.key, articles)
+
+    def filter(self, articles: Iterable[dict]) -> Generator[dict, None, None]:
+        """
+        Apply the index to the articles of a whole search (`to_dict()`, e.g.
+        cached) as a search stopping at the known ones would have: each one is
+        marked new or not, known ones are held back until a new one follows,
+        and a run of `stop_after` known articles ends it, left out.
+        The articles yielded are added to the index once all were consumed.
+        """
+        held, rows = [], []
+        for article in articles:
+            article = {**article, "is_new": article.get("url") not in self}
+            if not article["is_new"]:
+                held.append(article)
+                if len(held) >= self.stop_after:
+                    held.clear()
+                    break
+                continue
+            for a in (*held, article):
+                rows.append((a["url"], a.get("date"), a.get("title")))
+                yield a
+            held.clear()
+        for a in held:
+            rows.append((a["url"], a.get("date"), a.get("title")))
+            yield a
+        self.index.insert(self.key, rows)
+
+
+class SeenIndex:
+    """
+    Persistent index of the articles captured per query (SQLite), so a
+    recurring search stops paging once it reaches articles captured by a
+    previous run, and new articles can be told apart from known ones.
+
+    Usage:
+        with SeenIndex(CACHE_DIR / "seen.sqlite3") as index:
+            result_page.known = index.query(search_phrase, news_section)
+            ...
+            result_page.known.add(articles)
+
+    Args:
+        path (pathlib.Path): SQLite database file, created if missing.
+        stop_after (int): Consecutive known articles that end a search,
+            more than one so an old article bumped up doesn't end it early.
+        logger (Logger): Optional logger.
+    """
+
+    def __init__(self, path: pathlib.Path, stop_after: int = 3, logger: 'Logger' = None):
+        self.path = pathlib.Path(path)
+        self.stop_after = stop_after
+        self.logger = logger
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # shared by the pipeline stages, serialized by the lock
+        self.__connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    query TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    date INTEGER,
+                    title TEXT,
+                    first_seen INTEGER NOT NULL,
+                    last_seen INTEGER NOT NULL,
+                    PRIMARY KEY (query, url)
+                ) WITHOUT ROWID""")
+
+    def __enter__(self) -> 'SeenIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def query(self, search_phrase: str, news_section: str | list = None) -> KnownArticles:
+        return KnownArticles(self, query_key(search_phrase, news_section), self.stop_after)
+
+    def contains(self, key: str, url: str) -> bool:
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT 1 FROM articles WHERE query = ? AND url = ?",
+                (key, url)).fetchone() is not None
+
+    def add(self, key: str, articles: Iterable['Article']) -> int:
+        """ Record the articles of a query, returns how many were recorded """
+        return self.insert(key, [(a.url, int(a.date.timestamp()) if a.date else None, a.title)
+                                 for a in articles])
+
+    def insert(self, key: str, rows: Iterable[tuple[str, int, str]]) -> int:
+        """ Record (url, timestamp, title) rows of a query, see `add` """
+        now = int(time())
+        rows = [(key, url, date, title, now, now) for url, date, title in rows if url]
+        with self.__lock, self.__connection:
+            self.__connection.executemany("""
+                INSERT INTO articles (query, url, date, title, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (query, url) DO UPDATE SET last_seen = excluded.last_seen
+            """, rows)
+        if self.logger:
+            self.logger.debug(f"Indexed {len(rows)} articles")
+        return len(rows)
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from itertools import count
+from time import perf_counter
+from typing import Any, Generator, Optional
+import json
+import pathlib
+import threading
+
+
+class Span:
+    """ A timed operation, nested under the span that was open when it started """
+    __slots__ = ("id", "parent", "name", "attributes",
+                 "start", "end", "thread", "error")
+
+    def __init__(self, id: int, name: str, parent: Optional['Span'] = None, **attributes):
+        self.id = id
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+        self.start = perf_counter()
+        self.end: Optional[float] = None
+        self.thread = threading.current_thread().name
+        self.error: Optional[str] = None
+
+    @property
+    def parent_id(self) -> Optional[int]:
+        return self.parent.id if self.parent else None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or perf_counter()) - self.start
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float = 0.0) -> dict:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start - origin, 6),
+            "duration": round(self.duration, 6),
+            "thread": self.thread,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """ Nearest rank percentile of sorted `values`, `q` in [0, 1] """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+class Tracer:
+    """
+    Collects nested spans with `perf_counter` timings for a task run.
+
+    Usage:
+        with tracer.span("search", phrase="covid") as span:
+            ...
+            span.set(articles=10)
+    """
+
+    def __init__(self):
+        self.origin = perf_counter()
+        self.started = datetime.now()
+        self.spans: list[Span] = []
+        self.__ids = count(1)
+        self.__lock = threading.Lock()
+        self.__current: ContextVar[Optional[Span]] = ContextVar(
+            "current_span", default=None)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.origin = perf_counter()
+            self.started = datetime.now()
+            self.spans = []
+
+    def current(self) -> Optional[Span]:
+        """ The innermost open span of the calling context """
+        return self.__current.get()
+
+    def attribute(self, name: str, default: Any = None) -> Any:
+        """ `name` attribute of the innermost open span that has it """
+        span = self.__current.get()
+        while span is not None:
+            if name in span.attributes:
+                return span.attributes[name]
+            span = span.parent
+        return default
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Generator[Span, None, None]:
+        span = Span(next(self.__ids), name,
+                    self.__current.get(), **attributes)
+        token = self.__current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            span.end = perf_counter()
+            self.__current.reset(token)
+            with self.__lock:
+                self.spans.append(span)
+
+    def traced(self, name: str = None):
+        """ Decorator, runs the function inside a span """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__qualname__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self) -> dict[str, dict]:
+        """ Count, total, p50, p95 and max duration per span name """
+        with self.__lock:
+            spans = list(self.spans)
+        durations: dict[str, list[float]] = {}
+        for span in spans:
+            durations.setdefault(span.name, []).append(span.duration)
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "total": round(sum(values), 6),
+                "p50": round(percentile(values, 0.50), 6),
+                "p95": round(percentile(values, 0.95), 6),
+                "max": round(values[-1], 6),
+            }
+        return dict(sorted(summary.items(), key=lambda i: -i[1]["total"]))
+
+    def export(self, directory: pathlib.Path, name: str) -> pathlib.Path:
+        """ Write the spans and their summary to `<directory>/trace_<name>_<time>.json` """
+        with self.__lock:
+            spans = [span.to_dict(self.origin) for span in self.spans]
+        path = pathlib.Path(directory) / \
+            f"trace_{name}_{self.started:%Y%m%d_%H%M%S}.json"
+        with open(path, "w") as file:
+            json.dump({
+                "name": name,
+                "started": self.started.isoformat(),
+                "summary": self.summary(),
+                "spans": spans,
+            }, file, indent=2, default=str)
+        return path
+
+
+# One tracer per process, every task run is exported separately
+tracer = Tracer()
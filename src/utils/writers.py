@@ -0,0 +1,212 @@
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterable, List
+from openpyxl import Workbook
+from .default import QUERY_KEYS
+from .tracing import tracer
+import csv
+import hashlib
+import json
+import os
+import pathlib
+import re
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+COLUMNS = ["title", "date", "description", "image_path",
+           "search_phrase_occurrences", "has_amount", "is_new"]
+
+
+def query_name(payload: dict) -> str:
+    """
+    Deterministic name for the query of a work item, the same
+    payload always gives the same name (unlike `hash()`, salted per run).
+    """
+    query = {key: payload.get(key) for key in QUERY_KEYS}
+    digest = hashlib.sha1(json.dumps(
+        query, sort_keys=True, default=str).encode()).hexdigest()[:8]
+    phrase = payload.get("search_phrase") or "articles"
+    if not isinstance(phrase, str):
+        phrase = "_".join(phrase)
+    slug = re.sub(r"[^a-z0-9]+", "-", phrase.lower()).strip("-")
+    return f"{slug[:20]}_{digest}"
+
+
+def to_row(article: dict) -> list:
+    row = [article.get(column) for column in COLUMNS]
+    # from unix timestamp to datetime
+    date = row[1]
+    if date is not None:
+        row[1] = datetime.fromtimestamp(
+            date, timezone.utc).replace(tzinfo=None)
+    return row
+
+
+def _part_path(path: pathlib.Path) -> pathlib.Path:
+    # written aside and renamed once complete, a failed write never
+    # replaces the file of an earlier run
+    return path.with_name(f".{path.name}.{os.getpid()}.part")
+
+
+class ArticleWriter:
+    """
+    Streams articles to Excel with openpyxl's write-only mode, rows go to
+    disk as they are appended so memory stays flat whatever the size.
+    Files are only replaced once completely written.
+
+    Args:
+        directory (pathlib.Path): Where the files are written.
+        single_workbook (str): File name of a workbook holding every query
+            (one sheet per query). When empty, each query gets its own file.
+        formats (Iterable[str]): Extra formats written next to the Excel
+            file (`csv`, `parquet`).
+        batch_size (int): Rows per Parquet row group.
+        logger (Logger): Optional logger.
+    """
+
+    def __init__(self, directory: pathlib.Path, single_workbook: str = None,
+                 formats: Iterable[str] = (), batch_size: int = 10_000,
+                 logger: 'Logger' = None):
+        self.directory = pathlib.Path(directory)
+        self.single_workbook = single_workbook
+        self.formats = set(formats) - {"xlsx"}
+        self.batch_size = batch_size
+        self.logger = logger
+        self.__workbook = Workbook(write_only=True) if single_workbook else None
+
+    def __enter__(self) -> 'ArticleWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.__workbook is not None:
+            path = self.directory / self.single_workbook
+            self.__workbook.save(_part_path(path))
+            _part_path(path).replace(path)
+            self.__workbook = None
+            if self.logger:
+                self.logger.info(f"Saved workbook {path}")
+
+    @staticmethod
+    def _sheet_title(name: str) -> str:
+        # Excel: 31 characters at most, no []:*?/\
+        return re.sub(r"[\[\]:*?/\\]", "_", name)[:31]
+
+    def write(self, name: str, articles: Iterable[dict], item_id: str = None) -> List[pathlib.Path]:
+        """
+        Write the articles of one query.
+
+        Args:
+            name (str): Query name, used for the sheet and file names.
+            articles (Iterable[dict]): Articles, consumed once.
+            item_id (str): Work item id, added to the file names so two items
+                with the same query don't overwrite each other.
+
+        Returns:
+            List[pathlib.Path]: The files written (the shared workbook is
+                only saved on `close`).
+        """
+        with tracer.span("write_articles", query=name) as span:
+            paths, count = self._write(name, articles, item_id)
+            span.set(rows=count)
+        if self.logger:
+            self.logger.info(f"Wrote {count} articles for '{name}'")
+        return paths
+
+    def _write(self, name: str, articles: Iterable[dict],
+               item_id: str = None) -> tuple[List[pathlib.Path], int]:
+        stem = f"articles_{name}"
+        if item_id is not None:
+            stem += "_" + re.sub(r"[^\w-]+", "_", str(item_id))
+        paths = []
+        if self.__workbook is not None:
+            workbook = self.__workbook
+        else:
+            workbook = Workbook(write_only=True)
+            paths.append(self.directory / f"{stem}.xlsx")
+        sheet = workbook.create_sheet(self._sheet_title(name))
+        sheet.append(COLUMNS)
+
+        csv_file = csv_writer = parquet = None
+        try:
+            if "csv" in self.formats:
+                paths.append(self.directory / f"{stem}.csv")
+                csv_file = open(_part_path(paths[-1]), "w", newline="", encoding="utf-8")
+                csv_writer = csv.writer(csv_file)
+                csv_writer.writerow(COLUMNS)
+            if "parquet" in self.formats:
+                paths.append(self.directory / f"{stem}.parquet")
+                parquet = _ParquetStream(_part_path(paths[-1]), self.batch_size)
+
+            count = 0
+            for article in articles:
+                row = to_row(article)
+                sheet.append(row)
+                if csv_writer:
+                    csv_writer.writerow(row)
+                if parquet:
+                    parquet.append(row)
+                count += 1
+            if csv_file:
+                csv_file.close()
+            if parquet:
+                parquet.close()
+            if self.__workbook is None:
+                workbook.save(_part_path(paths[0]))
+        except BaseException:
+            if csv_file:
+                csv_file.close()
+            if parquet:
+                parquet.writer.close()
+            # finishes the sheet's temp file, then no half sheet in the shared workbook
+            sheet.close()
+            if self.__workbook is not None:
+                workbook.remove(sheet)
+            for path in paths:
+                _part_path(path).unlink(missing_ok=True)
+            raise
+
+        for path in paths:
+            _part_path(path).replace(path)
+        return paths, count
+
+
+class _ParquetStream:
+    # Buffers `batch_size` rows and writes them as a row group
+    def __init__(self, path: pathlib.Path, batch_size: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("title", pa.string()),
+            ("date", pa.timestamp("s")),
+            ("description", pa.string()),
+            ("image_path", pa.string()),
+            ("search_phrase_occurrences", pa.int64()),
+            ("has_amount", pa.bool_()),
+            ("is_new", pa.bool_()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.batch_size = batch_size
+        self.rows: list[list] = []
+
+    def append(self, row: list) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            columns = list(zip(*self.rows))
+            self.writer.write_table(self.pa.Table.from_arrays(
+                [self.pa.array(c, type=f.type)
+                 for c, f in zip(columns, self.schema)],
+                schema=self.schema))
+            self.rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
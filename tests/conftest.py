@@ -0,0 +1,15 @@
+import pathlib
+import sys
+
+import pytest
+
+# `src` and `benchmarks` are imported from the repository root
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+from benchmarks.fixture_site import FixtureSite, SiteConfig  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def site():
+    with FixtureSite(SiteConfig(results=30, image_size=5_000)) as site:
+        yield site
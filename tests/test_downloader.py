@@ -0,0 +1,47 @@
+from src.utils.downloader import ImageDownloader
+from src.utils.image_cache import ImageCache
+
+
+def test_download_all_keeps_order_and_writes_each_picture_once(site, tmp_path):
+    urls = [f"{site.url}/images/{i}.jpg" for i in (1, 2, 1)]
+    with ImageDownloader(tmp_path, max_workers=2) as downloader:
+        results = downloader.download_all(urls)
+
+    assert [r.url for r in results] == urls
+    assert all(r.ok for r in results)
+    assert results[0].path == results[2].path
+    assert results[0].path.stat().st_size == site.config.image_size
+    assert results[0].path.suffix == ".jpg"
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_failures_are_results_not_exceptions(site, tmp_path):
+    with ImageDownloader(tmp_path) as downloader:
+        missing, empty = downloader.download_all([f"{site.url}/nothing/here.jpg", None])
+
+    assert not missing.ok and "404" in missing.error
+    assert empty.error == "No url"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_summary_adds_up_every_batch(site, tmp_path):
+    with ImageDownloader(tmp_path) as downloader:
+        downloader.download_all([f"{site.url}/images/1.jpg", f"{site.url}/images/2.jpg"])
+        downloader.download_all([f"{site.url}/images/3.jpg", f"{site.url}/missing"])
+        summary = downloader.log_summary()
+        assert (summary.pictures, summary.failed) == (4, 1)
+        assert summary.size == 3 * site.config.image_size
+        assert downloader.log_summary().pictures == 0
+
+
+def test_cached_pictures_are_not_downloaded_again(site, tmp_path):
+    urls = [f"{site.url}/images/{i}.jpg" for i in range(3)]
+    cache = ImageCache(tmp_path / "cache", 10 * 1024 * 1024)
+    with ImageDownloader(tmp_path, cache=cache) as downloader:
+        first = downloader.download_all(urls)
+        again = downloader.download_all(urls)
+
+    assert [r.cached for r in first] == [False] * 3
+    assert [r.cached for r in again] == [True] * 3
+    assert [r.path for r in again] == [r.path for r in first]
+    assert all(r.path.parent == tmp_path.absolute() for r in again)
@@ -0,0 +1,79 @@
+import pytest
+
+# the news_browser package imports the Selenium library of the robot environment
+pytest.importorskip("RPA.Browser.Selenium")
+
+from src.utils.news_browser import BrowserPool  # noqa: E402
+
+
+class FakeBrowser:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.alive = True
+        self.closed = False
+
+    def reset(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+        self.alive = False
+
+
+def make_pool(size: int = 1) -> tuple[BrowserPool, list[FakeBrowser]]:
+    created = []
+
+    def factory(slot: int) -> FakeBrowser:
+        created.append(FakeBrowser(slot))
+        return created[-1]
+    return BrowserPool(factory, size=size, max_uses=0), created
+
+
+def crawl(pool: BrowserPool):
+    with pool.lease() as browser:
+        for page in range(3):
+            yield browser, page
+
+
+def test_lease_reuses_the_browser():
+    pool, created = make_pool()
+    for _ in range(3):
+        with pool.lease():
+            pass
+    assert len(created) == 1 and not created[0].closed
+
+
+def test_generator_closed_early_gives_the_slot_back():
+    pool, created = make_pool()
+    pages = crawl(pool)
+    next(pages)
+    pages.close()
+
+    # the browser left mid-page is discarded, its slot is free again
+    assert created[0].closed
+    with pool.lease() as browser:
+        assert browser is created[1] and browser.slot == 0
+
+
+def test_failure_keeps_a_live_browser_and_discards_a_crashed_one():
+    pool, created = make_pool()
+    with pytest.raises(ValueError), pool.lease():
+        raise ValueError
+    assert not created[0].closed
+
+    with pytest.raises(ValueError), pool.lease() as browser:
+        browser.alive = False
+        raise ValueError
+    with pool.lease() as browser:
+        assert browser is created[1] and browser.slot == 0
+
+
+def test_slots_stay_unique_with_several_browsers():
+    pool, created = make_pool(size=2)
+    first, second = crawl(pool), crawl(pool)
+    next(first), next(second)
+    first.close()
+    with pool.lease() as browser:
+        assert browser.slot == 0
+    second.close()
+    assert sorted(b.slot for b in created) == [0, 0, 1]